@@ -0,0 +1,50 @@
+from typing import Any, AsyncIterator, Iterator
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def iter_json(content: Any, depth: int = 1) -> Iterator[bytes]:
+    """
+    Encode content as JSON in chunks
+
+    Dicts down to `depth` levels are emitted one key at a time, and iterators
+    are emitted as JSON arrays one item at a time, so nothing larger than a
+    single entry is serialized at once.
+    """
+    if isinstance(content, dict) and depth > 0:
+        yield b"{"
+        for i, (key, value) in enumerate(content.items()):
+            yield (b"," if i else b"") + orjson.dumps(str(key)) + b":"
+            yield from iter_json(value, depth - 1)
+        yield b"}"
+    elif isinstance(content, Iterator):
+        yield b"["
+        for i, item in enumerate(content):
+            yield (b"," if i else b"") + orjson.dumps(item, option=ORJSON_OPTIONS)
+        yield b"]"
+    else:
+        yield orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def stream_json(content: Any, depth: int = 1) -> StreamingResponse:
+    """Stream content as a JSON document instead of buffering the full body"""
+    return StreamingResponse(iter_json(content, depth), media_type="application/json")
+
+
+def stream_events(events: AsyncIterator[Any]) -> StreamingResponse:
+    """Stream items as Server-Sent Events, one JSON-encoded `data:` message each"""
+    async def encode() -> AsyncIterator[bytes]:
+        async for event in events:
+            yield b"data: " + orjson.dumps(event, option=ORJSON_OPTIONS) + b"\n\n"
+
+    return StreamingResponse(encode(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -3,15 +3,16 @@ from pydantic import BaseModel
 from typing import Optional
 import uuid
 import asyncio
+from app.api.responses import ORJSONResponse, stream_events, stream_json
 from app.services.graph_service import GraphService
 
-router = APIRouter(prefix="/api/graph", tags=["graph"])
+router = APIRouter(prefix="/api/graph", tags=["graph"], default_response_class=ORJSONResponse)
 
 # Global graph service instance
 graph_service = GraphService()
 
 class CreateGraphRequest(BaseModel):
-    pmid: str
+    pmid: int  # Numeric strings from the form are coerced; anything else is a 422
     max_depth: Optional[int] = 3
 
 class GraphResponse(BaseModel):
@@ -19,12 +20,8 @@ class GraphResponse(BaseModel):
     status: str
     message: str
 
-class AnalyticsResponse(BaseModel):
-    graph_id: str
-    analytics: dict
-
 @router.post("/create", response_model=GraphResponse)
-async def create_graph(request: CreateGraphRequest, background_tasks: BackgroundTasks):
+def create_graph(request: CreateGraphRequest, background_tasks: BackgroundTasks):
     """Create a new knowledge graph from a seed PMID"""
     try:
         # Generate unique graph ID
@@ -50,51 +47,93 @@ async def create_graph(request: CreateGraphRequest, background_tasks: Background
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{graph_id}/status")
-async def get_graph_status(graph_id: str):
+def get_graph_status(graph_id: str):
     """Get the current status of a graph"""
     status = graph_service.get_graph_status(graph_id)
     if not status:
         raise HTTPException(status_code=404, detail="Graph not found")
     return status
 
+@router.get("/{graph_id}/events")
+async def stream_graph_events(graph_id: str):
+    """Push status updates for a graph as Server-Sent Events until it completes, fails or is deleted"""
+    if graph_service.get_graph_status(graph_id) is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    
+    async def events():
+        # Subscribed only once the response streams, so the finally below
+        # always runs; a client gone before that never leaves a queue behind
+        queue = graph_service.subscribe(graph_id)
+        if queue is None:
+            # Deleted since the check above
+            return
+        try:
+            while True:
+                status = await queue.get()
+                yield status
+                if status["status"] in graph_service.CLOSED_STATUSES:
+                    break
+        finally:
+            graph_service.unsubscribe(graph_id, queue)
+    
+    return stream_events(events())
+
 @router.get("/{graph_id}/data")
-async def get_graph_data(graph_id: str):
+def get_graph_data(graph_id: str):
     """Get the complete graph data for visualization"""
     data = graph_service.get_graph_data(graph_id)
     if not data:
         raise HTTPException(status_code=404, detail="Graph not found")
-    return data
+    # The payload is memoized for completed graphs; skip jsonable_encoder's copy of it
+    return ORJSONResponse(content=data)
+
+@router.get("/{graph_id}/data/stream")
+def stream_graph_data(graph_id: str):
+    """Stream the columnar graph data one value at a time"""
+    data = graph_service.iter_graph_data(graph_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    return stream_json(data, depth=2)
 
 @router.get("/list")
-async def list_graphs():
+def list_graphs():
     """List all graphs"""
     return graph_service.list_graphs()
 
 @router.delete("/{graph_id}")
-async def delete_graph(graph_id: str):
+def delete_graph(graph_id: str):
     """Delete a graph"""
-    if graph_id in graph_service.graphs:
-        del graph_service.graphs[graph_id]
+    if graph_service.delete_graph(graph_id):
         return {"message": f"Graph {graph_id} deleted successfully"}
     else:
         raise HTTPException(status_code=404, detail="Graph not found")
 
 @router.get("/{graph_id}/analytics")
-async def get_graph_analytics(graph_id: str):
+def get_graph_analytics(graph_id: str):
     """Get comprehensive analytics for a graph"""
     analytics = graph_service.get_graph_analytics(graph_id)
     if not analytics:
         raise HTTPException(status_code=404, detail="Graph not found or not completed")
-    return AnalyticsResponse(graph_id=graph_id, analytics=analytics)
+    # Return the response directly so the large payload skips jsonable_encoder
+    return ORJSONResponse(content={"graph_id": graph_id, "analytics": analytics})
+
+@router.get("/{graph_id}/analytics/stream")
+def stream_graph_analytics(graph_id: str):
+    """Stream comprehensive analytics for a graph, one per-node score at a time"""
+    analytics = graph_service.get_graph_analytics(graph_id)
+    if not analytics:
+        raise HTTPException(status_code=404, detail="Graph not found or not completed")
+    # Depth 4 reaches the per-node maps, e.g. analytics -> centrality_measures -> pagerank
+    return stream_json({"graph_id": graph_id, "analytics": analytics}, depth=4)
 
 @router.get("/{graph_id}/nodes/{node_id}/analytics")
-async def get_node_analytics(graph_id: str, node_id: str):
+def get_node_analytics(graph_id: str, node_id: int):
     """Get detailed analytics for a specific node in a graph"""
     analytics = graph_service.get_node_analytics(graph_id, node_id)
     if not analytics:
         raise HTTPException(status_code=404, detail="Node or graph not found")
-    return {
+    return ORJSONResponse(content={
         "graph_id": graph_id,
         "node_id": node_id,
         "analytics": analytics
-    } 
\ No newline at end of file
+    }) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
@@ -9,9 +9,10 @@ router = APIRouter()
 
 templates = Jinja2Templates(directory=str(get_templates_dir()))
 
-
-@router.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "title": "Home"})
+# The landing page is static, so render it once instead of on every request
+INDEX_HTML: bytes = templates.get_template("index.html").render(title="Home").encode("utf-8")
 
 
+@router.get("/", response_class=HTMLResponse)
+def read_root():
+    return HTMLResponse(content=INDEX_HTML, headers={"Cache-Control": "public, max-age=300"})
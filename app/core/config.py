@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -10,4 +11,29 @@ PROJECT_ROOT: Path = APP_DIR.parent
 TEMPLATES_DIR: Path = APP_DIR / "templates"
 STATIC_DIR: Path = APP_DIR / "static"
 
+# Worker threads available to sync route handlers
+THREADPOOL_SIZE: int = int(os.getenv("THREADPOOL_SIZE", "40"))
 
+# On-disk cache of records parsed from PubMed E-utilities responses
+PUBMED_CACHE_DIR: Path = Path(os.getenv("PUBMED_CACHE_DIR", str(PROJECT_ROOT / ".pubmed_cache")))
+PUBMED_CACHE_TTL: int = int(os.getenv("PUBMED_CACHE_TTL", str(30 * 24 * 3600)))
+# Set PUBMED_CACHE_DISABLE=1 to always fetch fresh data, e.g. in tests
+PUBMED_CACHE_DISABLE: bool = os.getenv("PUBMED_CACHE_DISABLE", "").lower() not in ("", "0", "false", "no")
+
+# NCBI E-utilities identification; an API key raises the rate limit from 3 to 10 requests/second
+NCBI_API_KEY: str = os.getenv("NCBI_API_KEY", "")
+NCBI_TOOL: str = os.getenv("NCBI_TOOL", "pubmedx")
+NCBI_EMAIL: str = os.getenv("NCBI_EMAIL", "")
+
+# Completed graphs are pickled here; only the most recently used stay in memory
+GRAPH_STORE_DIR: Path = Path(os.getenv("GRAPH_STORE_DIR", str(PROJECT_ROOT / ".graphs")))
+GRAPH_MEMORY_LIMIT: int = int(os.getenv("GRAPH_MEMORY_LIMIT", "8"))
+
+# Worker processes for graph analytics; each holds a graph's distance blocks in memory
+ANALYTICS_WORKERS: int = int(os.getenv("ANALYTICS_WORKERS", str(min(os.cpu_count() or 1, 4))))
+
+# Level for the app's own loggers; DEBUG adds per-article crawl output
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# HTTP client for E-utilities: "httpx" (HTTP/2) or "aiohttp" (HTTP/1.1)
+PUBMED_HTTP_CLIENT: str = os.getenv("PUBMED_HTTP_CLIENT", "httpx").lower()
@@ -1,12 +1,27 @@
+import logging
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from app.api.routes.home import router as home_router
 from app.api.routes.graph import router as graph_router
+from app.core.config import LOG_LEVEL, THREADPOOL_SIZE
 from app.utils.paths import get_static_dir
 
 
-app = FastAPI(title="pubmedx")
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("app").setLevel(LOG_LEVEL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync handlers run in anyio's threadpool; bound it explicitly
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+
+app = FastAPI(title="pubmedx", lifespan=lifespan)
 
 
 app.mount("/static", StaticFiles(directory=str(get_static_dir())), name="static")
@@ -1,45 +1,299 @@
 import networkx as nx
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
 import numpy as np
-from collections import defaultdict
+import scipy as sp
+import scipy.sparse.linalg
+from scipy.sparse import csgraph
+from collections import OrderedDict, defaultdict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context, shared_memory
+import asyncio
+import hashlib
 import logging
+import os
+import random
+import warnings
+
+try:
+    import igraph as ig
+except ImportError:  # optional C backend; NetworkX/SciPy are used without it
+    ig = None
+from app.core.config import ANALYTICS_WORKERS
 
 logger = logging.getLogger(__name__)
 
+CENTRALITY_MEASURES = (
+    'degree_centrality', 'betweenness_centrality', 'closeness_centrality',
+    'eigenvector_centrality', 'pagerank', 'hubs', 'authorities'
+)
+
+# Per-source kernels over CSR arrays. They live at module level so worker
+# processes can run them against adjacency arrays held in shared memory.
+
+def _csr_rows(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Every (row, column) entry of the given CSR rows, as two aligned arrays"""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    positions = np.arange(counts.sum()) + np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return np.repeat(rows, counts), indices[positions]
+
+
+def _brandes_chunk(indptr: np.ndarray, indices: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """
+    Brandes dependency sums for one batch of source nodes
+    
+    Each BFS is level-synchronous and direction-optimizing: a level is expanded
+    top-down from the frontier's out-edges, or bottom-up from the unvisited
+    nodes' in-edges, whichever touches fewer edges. Either way it yields the
+    shortest-path DAG edges into the next level, which are replayed in reverse
+    to accumulate dependencies.
+    """
+    n = len(indptr) - 1
+    out_degree = np.diff(indptr)
+    # Reversed CSR (in-edges) for bottom-up levels
+    in_degree = np.bincount(indices, minlength=n)
+    reversed_indptr = np.concatenate(([0], np.cumsum(in_degree)))
+    reversed_indices = np.repeat(np.arange(n), out_degree)[np.argsort(indices, kind='stable')]
+    total_in_edges = int(in_degree.sum())
+    
+    betweenness = np.zeros(n)
+    for s in sources.tolist():
+        distance = np.full(n, -1, dtype=np.int64)
+        distance[s] = 0
+        sigma = np.zeros(n)
+        sigma[s] = 1.0
+        frontier = np.array([s])
+        unvisited_edges = total_in_edges - int(in_degree[s])
+        levels = []  # (predecessors, successors) DAG edges into each level
+        depth = 0
+        while frontier.size:
+            if unvisited_edges < int(out_degree[frontier].sum()):
+                successors, predecessors = _csr_rows(reversed_indptr, reversed_indices, np.flatnonzero(distance < 0))
+                on_dag = distance[predecessors] == depth
+            else:
+                predecessors, successors = _csr_rows(indptr, indices, frontier)
+                on_dag = distance[successors] < 0
+            predecessors, successors = predecessors[on_dag], successors[on_dag]
+            frontier = np.unique(successors)
+            depth += 1
+            distance[frontier] = depth
+            np.add.at(sigma, successors, sigma[predecessors])
+            unvisited_edges -= int(in_degree[frontier].sum())
+            levels.append((predecessors, successors))
+        
+        delta = np.zeros(n)
+        for predecessors, successors in reversed(levels):
+            np.add.at(delta, predecessors, sigma[predecessors] / sigma[successors] * (1 + delta[successors]))
+        delta[s] = 0.0
+        betweenness += delta
+    return betweenness
+
+
+# Distances held at once when computing them a block of rows at a time
+# (2^22 float64 cells, 32 MB), however many nodes the graph has
+DISTANCE_BLOCK_CELLS = 1 << 22
+
+
+def _distance_blocks(adjacency: sp.sparse.csr_array, sources: np.ndarray) -> Iterator[np.ndarray]:
+    """Unweighted shortest path lengths from the sources, a bounded block of rows at a time"""
+    step = max(DISTANCE_BLOCK_CELLS // max(adjacency.shape[0], 1), 1)
+    for start in range(0, len(sources), step):
+        yield csgraph.shortest_path(adjacency, directed=True, unweighted=True, indices=sources[start:start + step])
+
+
+def _closeness_chunk(indptr: np.ndarray, indices: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Closeness of the target nodes, given the CSR arrays of the reversed graph"""
+    n = len(indptr) - 1
+    reversed_adjacency = sp.sparse.csr_array((np.ones(len(indices)), indices, indptr), shape=(n, n))
+    # Row i of each block holds the distances from every node to a target
+    return np.concatenate([_closeness_from_distances(block) for block in _distance_blocks(reversed_adjacency, targets)])
+
+
+def _closeness_from_distances(distances: np.ndarray) -> np.ndarray:
+    """Closeness of each row's target, given the distances from every node to it"""
+    n = distances.shape[1]
+    reachable = np.isfinite(distances)
+    total = np.where(reachable, distances, 0).sum(axis=1)
+    reached = reachable.sum(axis=1) - 1.0
+    closeness = np.zeros(len(distances))
+    mask = total > 0
+    if n > 1:
+        closeness[mask] = (reached[mask] / total[mask]) * (reached[mask] / (n - 1))
+    return closeness
+
+
+def _run_shared_chunk(kernel: Callable, specs: List[Tuple[str, int, str]], batch: np.ndarray) -> np.ndarray:
+    """Worker entry point: attach to the shared CSR arrays and run one batch"""
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    try:
+        indptr, indices = (
+            np.ndarray((size,), dtype=dtype, buffer=block.buf)
+            for block, (_, size, dtype) in zip(blocks, specs)
+        )
+        result = kernel(indptr, indices, batch)
+        del indptr, indices
+        return result
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _analyze_detached(graph: nx.DiGraph) -> Dict:
+    """Worker entry point: run a full analysis of a pickled graph"""
+    return GraphAnalyticsService(max_workers=0)._analyze_graph(graph, graph.number_of_nodes(), graph.number_of_edges())
+
+
 class GraphAnalyticsService:
     """Service for analyzing graph properties and metrics"""
     
-    def __init__(self):
-        pass
+    BETWEENNESS_SAMPLE_SIZE = 128  # Source nodes sampled for betweenness on larger graphs
+    BETWEENNESS_SEED = 0  # Fixed, so repeated analyses of a graph sample the same sources
+    BETWEENNESS_CHUNK_SIZE = 16  # Source nodes accumulated per batch
+    PARALLEL_MIN_NODES = 2000  # Smaller graphs are not worth the process round-trip
+    DISTANCE_MATRIX_MAX_NODES = 1024  # Above this, distances go a block of rows at a time instead of one n^2 matrix (8 MB here)
+    STRUCTURE_CACHE_SIZE = 32  # Structures whose PageRank/communities are memoized
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        # graph id -> (version, analytics) for the last completed analysis
+        self._cache: Dict[object, Tuple[Tuple[int, int, int], Dict]] = {}
+        
+        # (structure hash, measure) -> result, least recently used first; shared
+        # across graph ids, so identical graphs reuse PageRank and communities
+        self._structure_cache: OrderedDict = OrderedDict()
+        
+        # Per-source BFS work (betweenness, closeness) is spread over worker
+        # processes; workers start on first use, and max_workers <= 1 disables them
+        self.max_workers = ANALYTICS_WORKERS if max_workers is None else max_workers
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context('spawn'))
+    
+    @staticmethod
+    def _cache_key(graph: nx.DiGraph) -> object:
+        return graph.graph.get('id', id(graph))
+    
+    @staticmethod
+    def _graph_version(graph: nx.DiGraph) -> Tuple[int, int, int]:
+        """
+        Version stamp for a graph
+        
+        Combines the 'version' counter bumped by the graph-build path with the
+        node and edge counts, so graphs mutated elsewhere are still caught.
+        """
+        return (graph.graph.get('version', 0), graph.number_of_nodes(), graph.number_of_edges())
+    
+    def invalidate(self, graph_id: str) -> None:
+        """Drop cached analytics for a graph"""
+        self._cache.pop(graph_id, None)
+    
+    @staticmethod
+    def _structure_key(nodelist: List, adjacency: sp.sparse.csr_array) -> bytes:
+        """Digest of a graph's node ids and edge set, in nodelist order"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update('\0'.join(map(str, nodelist)).encode())
+        digest.update(adjacency.indptr.tobytes())
+        digest.update(adjacency.indices.tobytes())
+        return digest.digest()
+    
+    def _memoized(self, structure_key: Optional[bytes], measure: str, compute: Callable):
+        """Return compute() for this structure, reusing a result memoized earlier"""
+        if structure_key is None:
+            return compute()
+        key = (structure_key, measure)
+        if key in self._structure_cache:
+            self._structure_cache.move_to_end(key)
+            return self._structure_cache[key]
+        result = self._structure_cache[key] = compute()
+        if len(self._structure_cache) > self.STRUCTURE_CACHE_SIZE:
+            self._structure_cache.popitem(last=False)
+        return result
     
     def analyze_graph(self, graph: nx.DiGraph) -> Dict:
         """
         Perform comprehensive graph analysis
         
+        Results are cached per graph and reused until the graph's version
+        changes.
+        
         Args:
             graph: NetworkX directed graph
             
         Returns:
             Dictionary containing all analysis results
         """
+        key = self._cache_key(graph)
+        version = self._graph_version(graph)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        _, n, m = version
+        analytics = self._analyze_graph(graph, n, m)
+        if 'error' not in analytics:
+            self._cache[key] = (version, analytics)
+        return analytics
+    
+    async def precompute(self, graph: nx.DiGraph) -> None:
+        """
+        Analyze a graph in a worker process and cache the result
+        
+        Keeps the CPU-bound analysis off the event loop so the first analytics
+        request for a freshly built graph is a cache hit. Does nothing when
+        worker processes are disabled; analyze_graph then computes on demand.
+        """
+        if self._executor is None:
+            return
+        
+        key = self._cache_key(graph)
+        version = self._graph_version(graph)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return
+        
+        analytics = await asyncio.get_running_loop().run_in_executor(self._executor, _analyze_detached, graph)
+        # Discard the result if the graph changed while the worker ran
+        if 'error' not in analytics and self._graph_version(graph) == version:
+            self._cache[key] = (version, analytics)
+    
+    def _analyze_graph(self, graph: nx.DiGraph, n: int, m: int) -> Dict:
+        """Run every analysis on a graph with n nodes and m edges"""
         try:
+            density = m / (n * (n - 1)) if n > 1 else 0
+            
+            # Degree arrays, aligned with graph.nodes(), shared by every analysis
+            in_degrees, out_degrees = self._degree_arrays(graph, n)
+            
+            # Connected components, computed once and shared by every analysis
+            weak_components = list(nx.weakly_connected_components(graph))
+            strong_components = list(nx.strongly_connected_components(graph))
+            
             # Basic graph statistics
-            basic_stats = self._get_basic_statistics(graph)
+            basic_stats = self._get_basic_statistics(n, m, density, in_degrees + out_degrees, weak_components)
+            
+            # CSR adjacency, plus an igraph copy when available, shared by the structural analyses
+            nodelist = list(graph)
+            adjacency = self._adjacency_matrix(graph, nodelist)
+            ig_graph = self._to_igraph(adjacency) if ig is not None else None
+            structure_key = self._structure_key(nodelist, adjacency)
+            
+            # All-pairs shortest path lengths, shared by closeness and path analysis
+            distances = self._distance_matrix(adjacency) if 0 < n <= self.DISTANCE_MATRIX_MAX_NODES else None
             
             # Centrality measures
-            centrality_measures = self._calculate_centrality_measures(graph)
+            centrality_measures = self._calculate_centrality_measures(nodelist, adjacency, ig_graph, distances, structure_key)
             
             # Clustering and community analysis
-            clustering_analysis = self._analyze_clustering(graph)
+            clustering_analysis = self._analyze_clustering(graph, ig_graph, structure_key)
             
             # Path analysis
-            path_analysis = self._analyze_paths(graph)
+            path_analysis = self._analyze_paths(nodelist, adjacency, strong_components, distances)
             
             # Network structure analysis
-            structure_analysis = self._analyze_network_structure(graph)
+            structure_analysis = self._analyze_network_structure(graph, in_degrees, out_degrees)
             
             # Research insights
-            research_insights = self._generate_research_insights(graph, centrality_measures)
+            research_insights = self._generate_research_insights(graph, centrality_measures, in_degrees, out_degrees, weak_components)
             
             return {
                 'basic_statistics': basic_stats,
@@ -48,72 +302,129 @@ class GraphAnalyticsService:
                 'path_analysis': path_analysis,
                 'network_structure': structure_analysis,
                 'research_insights': research_insights,
-                'summary': self._generate_summary(graph, centrality_measures, clustering_analysis)
+                'summary': self._generate_summary(n, m, density, centrality_measures, clustering_analysis, weak_components)
             }
             
         except Exception as e:
             logger.error(f"Error analyzing graph: {e}")
             return {'error': str(e)}
     
-    def _get_basic_statistics(self, graph: nx.DiGraph) -> Dict:
+    def _degree_arrays(self, graph: nx.DiGraph, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Collect in- and out-degrees in a single pass each, in graph.nodes() order"""
+        in_degrees = np.fromiter((d for _, d in graph.in_degree()), dtype=np.int64, count=n)
+        out_degrees = np.fromiter((d for _, d in graph.out_degree()), dtype=np.int64, count=n)
+        return in_degrees, out_degrees
+    
+    def _get_basic_statistics(self, n: int, m: int, density: float, degrees: np.ndarray, weak_components: List[set]) -> Dict:
         """Calculate basic graph statistics"""
         try:
             return {
-                'total_nodes': graph.number_of_nodes(),
-                'total_edges': graph.number_of_edges(),
-                'density': nx.density(graph),
-                'average_degree': sum(dict(graph.degree()).values()) / graph.number_of_nodes() if graph.number_of_nodes() > 0 else 0,
-                'max_degree': max(dict(graph.degree()).values()) if graph.number_of_nodes() > 0 else 0,
-                'min_degree': min(dict(graph.degree()).values()) if graph.number_of_nodes() > 0 else 0,
-                'is_connected': nx.is_weakly_connected(graph),
-                'number_of_components': nx.number_weakly_connected_components(graph),
-                'largest_component_size': len(max(nx.weakly_connected_components(graph), key=len)) if graph.number_of_nodes() > 0 else 0
+                'total_nodes': n,
+                'total_edges': m,
+                'density': density,
+                'average_degree': float(degrees.mean()) if degrees.size > 0 else 0,
+                'max_degree': int(degrees.max()) if degrees.size > 0 else 0,
+                'min_degree': int(degrees.min()) if degrees.size > 0 else 0,
+                'is_connected': len(weak_components) == 1,
+                'number_of_components': len(weak_components),
+                'largest_component_size': max(map(len, weak_components)) if n > 0 else 0
             }
         except Exception as e:
             logger.error(f"Error calculating basic statistics: {e}")
             return {}
     
-    def _calculate_centrality_measures(self, graph: nx.DiGraph) -> Dict:
+    def _adjacency_matrix(self, graph: nx.DiGraph, nodelist: List) -> sp.sparse.csr_array:
+        """Unweighted CSR adjacency matrix in nodelist order"""
+        if not nodelist:
+            return sp.sparse.csr_array((0, 0))
+        return nx.to_scipy_sparse_array(graph, nodelist=nodelist, weight=None, dtype=float, format='csr')
+    
+    def _distance_matrix(self, adjacency: sp.sparse.csr_array) -> np.ndarray:
+        """Dense matrix of unweighted shortest path lengths, D[i, j] from node i to node j"""
+        return csgraph.shortest_path(adjacency, directed=True, unweighted=True)
+    
+    def _to_igraph(self, adjacency: sp.sparse.csr_array) -> 'ig.Graph':
+        """Directed igraph copy of a CSR adjacency matrix, vertex i being nodelist[i]"""
+        edges = np.column_stack(adjacency.nonzero()).tolist()
+        return ig.Graph(n=adjacency.shape[0], edges=edges, directed=True)
+    
+    def _calculate_centrality_measures(self, nodelist: List, adjacency: sp.sparse.csr_array,
+                                       ig_graph: Optional['ig.Graph'] = None, distances: Optional[np.ndarray] = None,
+                                       structure_key: Optional[bytes] = None, chunk_size: Optional[int] = None) -> Dict:
         """Calculate various centrality measures for nodes"""
         try:
-            # Convert to undirected for some centrality measures
-            undirected_graph = graph.to_undirected()
-            
             centrality_measures = {}
+            n = len(nodelist)
+            if n == 0:
+                return {measure: {} for measure in CENTRALITY_MEASURES}
+            
+            def by_node(values: np.ndarray) -> Dict:
+                return dict(zip(nodelist, values.tolist()))
             
             # Degree centrality
-            centrality_measures['degree_centrality'] = nx.degree_centrality(graph)
+            if n > 1:
+                degrees = np.asarray(adjacency.sum(axis=0) + adjacency.sum(axis=1)).ravel()
+                centrality_measures['degree_centrality'] = by_node(degrees / (n - 1))
+            else:
+                centrality_measures['degree_centrality'] = {node: 1 for node in nodelist}
             
             # Betweenness centrality (can be slow for large graphs)
             try:
-                centrality_measures['betweenness_centrality'] = nx.betweenness_centrality(graph, k=min(100, graph.number_of_nodes()))
-            except:
+                betweenness = self._betweenness_centrality(
+                    adjacency, k=min(self.BETWEENNESS_SAMPLE_SIZE, n),
+                    chunk_size=chunk_size or self.BETWEENNESS_CHUNK_SIZE, ig_graph=ig_graph
+                )
+                centrality_measures['betweenness_centrality'] = by_node(betweenness)
+            except (BrokenExecutor, OSError) as e:
+                logger.warning(f"Betweenness centrality failed on a graph with {n} nodes: {e}")
                 centrality_measures['betweenness_centrality'] = {}
             
             # Closeness centrality
             try:
-                centrality_measures['closeness_centrality'] = nx.closeness_centrality(graph)
-            except:
+                if distances is not None:
+                    closeness = _closeness_from_distances(distances.T)
+                else:
+                    closeness = self._closeness_centrality(adjacency)
+                centrality_measures['closeness_centrality'] = by_node(closeness)
+            except (BrokenExecutor, OSError) as e:
+                logger.warning(f"Closeness centrality failed on a graph with {n} nodes: {e}")
                 centrality_measures['closeness_centrality'] = {}
             
-            # Eigenvector centrality
+            # Iterative measures: a measure that fails to converge is retried once
+            # with a looser tolerance, and a final failure is memoized with the
+            # structure so later analyses skip it instead of iterating again
+            
+            # Eigenvector centrality, on the undirected (symmetrized) adjacency
             try:
-                centrality_measures['eigenvector_centrality'] = nx.eigenvector_centrality_numpy(undirected_graph, max_iter=1000)
-            except:
+                symmetric = ((adjacency + adjacency.T) > 0).astype(float)
+                eigenvector = self._memoized(structure_key, 'eigenvector_centrality', partial(
+                    self._converge, 'eigenvector_centrality', n,
+                    partial(self._eigenvector_centrality, symmetric, max_iter=1000), tolerances=(0, 1.0e-6)
+                ))
+                centrality_measures['eigenvector_centrality'] = by_node(eigenvector) if eigenvector is not None else {}
+            except (nx.AmbiguousSolution, nx.NetworkXError):
                 centrality_measures['eigenvector_centrality'] = {}
             
             # PageRank
-            try:
-                centrality_measures['pagerank'] = nx.pagerank(graph, alpha=0.85)
-            except:
-                centrality_measures['pagerank'] = {}
+            pagerank = self._memoized(structure_key, 'pagerank', partial(
+                self._converge, 'pagerank', n,
+                partial(self._pagerank_scores, adjacency, ig_graph), tolerances=(1.0e-6, 1.0e-4)
+            ))
+            centrality_measures['pagerank'] = by_node(pagerank) if pagerank is not None else {}
             
             # HITS (Hubs and Authorities)
             try:
-                hubs, authorities = nx.hits(graph, max_iter=1000)
-                centrality_measures['hubs'] = hubs
-                centrality_measures['authorities'] = authorities
-            except:
+                hits = self._memoized(structure_key, 'hits', partial(
+                    self._converge, 'hits', n,
+                    partial(self._hits_scores, adjacency, ig_graph, max_iter=1000), tolerances=(1.0e-8, 1.0e-6)
+                ))
+            except nx.NetworkXError:
+                hits = None
+            if hits is not None:
+                hubs, authorities = hits
+                centrality_measures['hubs'] = by_node(hubs)
+                centrality_measures['authorities'] = by_node(authorities)
+            else:
                 centrality_measures['hubs'] = {}
                 centrality_measures['authorities'] = {}
             
@@ -123,27 +434,233 @@ class GraphAnalyticsService:
             logger.error(f"Error calculating centrality measures: {e}")
             return {}
     
-    def _analyze_clustering(self, graph: nx.DiGraph) -> Dict:
-        """Analyze clustering and community structure"""
+    def _map_chunks(self, kernel: Callable, adjacency: sp.sparse.csr_array, batches: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Run a CSR kernel over batches of nodes
+        
+        Large graphs fan the batches out to the worker processes, which read
+        the adjacency from shared memory instead of receiving a pickled copy
+        per batch; small graphs run them in-process.
+        """
+        if self._executor is None or adjacency.shape[0] < self.PARALLEL_MIN_NODES or len(batches) < 2:
+            return [kernel(adjacency.indptr, adjacency.indices, batch) for batch in batches]
+        
+        blocks = []
+        try:
+            specs = []
+            for array in (adjacency.indptr, adjacency.indices):
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                specs.append((block.name, len(array), array.dtype.str))
+            futures = [self._executor.submit(_run_shared_chunk, kernel, specs, batch) for batch in batches]
+            return [future.result() for future in futures]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+    
+    def _node_batches(self, nodes: np.ndarray, chunk_size: Optional[int] = None) -> List[np.ndarray]:
+        """Split nodes into fixed-size batches, or one batch per worker"""
+        if chunk_size is None:
+            return [batch for batch in np.array_split(nodes, max(self.max_workers, 1)) if len(batch)]
+        return [nodes[start:start + chunk_size] for start in range(0, len(nodes), chunk_size)]
+    
+    def _betweenness_centrality(self, adjacency: sp.sparse.csr_array, k: int, chunk_size: int,
+                                ig_graph: Optional['ig.Graph'] = None) -> np.ndarray:
+        """
+        Normalized betweenness centrality from k sampled sources, as nx.betweenness_centrality
+        
+        With igraph the sampled sources go to its C implementation in one call.
+        Otherwise sources are processed in batches of chunk_size; each batch
+        accumulates into its own partial sum and the partial sums are added up
+        at the end.
+        """
+        n = adjacency.shape[0]
+        sampled = k < n
+        sources = np.array(random.Random(self.BETWEENNESS_SEED).sample(range(n), k) if sampled else range(n), dtype=np.int64)
+        
+        if ig_graph is not None:
+            betweenness = np.array(ig_graph.betweenness(directed=True, sources=sources.tolist() if sampled else None))
+        else:
+            partials = self._map_chunks(_brandes_chunk, adjacency, self._node_batches(sources, chunk_size))
+            betweenness = np.sum(partials, axis=0) if partials else np.zeros(n)
+        
+        return self._rescale_betweenness(betweenness, sources if sampled else None)
+    
+    @staticmethod
+    def _rescale_betweenness(betweenness: np.ndarray, sampled: Optional[np.ndarray]) -> np.ndarray:
+        """Normalize directed betweenness over ordered (s, t) pairs, correcting for sampled sources"""
+        pairs = len(betweenness) - 1  # endpoints are excluded, so v is never the target
+        if pairs < 2:
+            return betweenness
+        
+        if sampled is None:
+            return betweenness / (pairs * (pairs - 1))
+        
+        # A sampled source never counts towards its own betweenness
+        k = len(sampled)
+        scale = np.full(len(betweenness), 1 / (k * (pairs - 1)))
+        scale[sampled] = 1 / ((k - 1) * (pairs - 1)) if k > 1 else np.nan
+        return betweenness * scale
+    
+    def _closeness_centrality(self, adjacency: sp.sparse.csr_array) -> np.ndarray:
+        """
+        Closeness centrality from one C-level BFS per node
+        
+        Matches nx.closeness_centrality for directed graphs: incoming
+        distances, with the Wasserman-Faust correction for unreachable nodes.
+        """
+        reversed_adjacency = adjacency.T.tocsr()
+        nodes = np.arange(adjacency.shape[0])
+        return np.concatenate(self._map_chunks(_closeness_chunk, reversed_adjacency, self._node_batches(nodes)))
+    
+    def _converge(self, measure: str, n: int, compute: Callable, tolerances: Tuple[float, float]):
+        """
+        Run an iterative measure, retrying once with the looser tolerance
+        
+        compute(tol=...) may raise nx.PowerIterationFailedConvergence. Returns
+        None if it fails at both tolerances.
+        """
+        tol, loose_tol = tolerances
+        try:
+            return compute(tol=tol)
+        except nx.PowerIterationFailedConvergence:
+            logger.warning(f"{measure} did not converge on a graph with {n} nodes (tol={tol}); retrying with tol={loose_tol}")
+        try:
+            return compute(tol=loose_tol)
+        except nx.PowerIterationFailedConvergence:
+            logger.warning(f"{measure} did not converge on a graph with {n} nodes (tol={loose_tol}); skipping it")
+            return None
+    
+    def _eigenvector_centrality(self, symmetric: sp.sparse.csr_array, max_iter: int, tol: float = 0) -> np.ndarray:
+        """Eigenvector centrality of an undirected adjacency matrix, as nx.eigenvector_centrality_numpy"""
+        if symmetric.shape[0] < 3:
+            raise nx.NetworkXError("ARPACK eigenvector centrality needs at least 3 nodes")
+        n_components, _ = csgraph.connected_components(symmetric, directed=False)
+        if n_components > 1:
+            raise nx.AmbiguousSolution("eigenvector centrality is ambiguous for disconnected graphs")
+        try:
+            _, eigenvector = sp.sparse.linalg.eigs(symmetric.T, k=1, which='LR', maxiter=max_iter, tol=tol)
+        except sp.sparse.linalg.ArpackNoConvergence as exc:
+            raise nx.PowerIterationFailedConvergence(max_iter) from exc
+        largest = eigenvector.flatten().real
+        return largest / (np.sign(largest.sum()) * np.linalg.norm(largest))
+    
+    def _pagerank_scores(self, adjacency: sp.sparse.csr_array, ig_graph: Optional['ig.Graph'] = None,
+                         tol: float = 1.0e-6) -> np.ndarray:
+        """PageRank with damping 0.85, on igraph when available"""
+        if ig_graph is not None:
+            return np.array(ig_graph.pagerank(directed=True, damping=0.85))
+        return self._pagerank(adjacency, alpha=0.85, tol=tol)
+    
+    def _pagerank(self, adjacency: sp.sparse.csr_array, alpha: float, max_iter: int = 100, tol: float = 1.0e-6) -> np.ndarray:
+        """PageRank by sparse power iteration, as nx.pagerank"""
+        n = adjacency.shape[0]
+        out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        is_dangling = out_degree == 0
+        inverse = np.zeros(n)
+        inverse[~is_dangling] = 1.0 / out_degree[~is_dangling]
+        transition = (sp.sparse.dia_array((inverse, 0), shape=(n, n)) @ adjacency).tocsr()
+        
+        x = np.full(n, 1.0 / n)
+        p = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            x_last = x
+            x = alpha * (x @ transition + x[is_dangling].sum() * p) + (1 - alpha) * p
+            if np.absolute(x - x_last).sum() < n * tol:
+                return x
+        raise nx.PowerIterationFailedConvergence(max_iter)
+    
+    def _hits_scores(self, adjacency: sp.sparse.csr_array, ig_graph: Optional['ig.Graph'] = None,
+                     max_iter: int = 1000, tol: float = 1.0e-8) -> Tuple[np.ndarray, np.ndarray]:
+        """HITS hub and authority scores summing to 1, on igraph when available"""
+        if ig_graph is None or adjacency.shape[0] < 2:
+            return self._hits(adjacency, max_iter=max_iter, tol=tol)
+        if adjacency.nnz == 0:
+            # igraph scores an edgeless graph uniformly; ARPACK, like nx.hits, fails on it
+            raise nx.NetworkXError("HITS is undefined for a graph without edges")
+        try:
+            with warnings.catch_warnings():
+                # igraph warns when many scores are zero, which citation graphs routinely have
+                warnings.simplefilter('ignore', RuntimeWarning)
+                hubs = np.array(ig_graph.hub_score(scale=False))
+                authorities = np.array(ig_graph.authority_score(scale=False))
+        except ig.InternalError as exc:
+            raise nx.PowerIterationFailedConvergence(max_iter) from exc
+        return self._normalized_hits(hubs, authorities)
+    
+    def _hits(self, adjacency: sp.sparse.csr_array, max_iter: int, tol: float = 1.0e-8) -> Tuple[np.ndarray, np.ndarray]:
+        """HITS hub and authority scores from a truncated SVD, as nx.hits"""
+        if adjacency.shape[0] < 2:
+            raise nx.NetworkXError("ARPACK HITS needs at least 2 nodes")
+        try:
+            _, _, vt = sp.sparse.linalg.svds(adjacency, k=1, maxiter=max_iter, tol=tol)
+        except sp.sparse.linalg.ArpackNoConvergence as exc:
+            raise nx.PowerIterationFailedConvergence(max_iter) from exc
+        except sp.sparse.linalg.ArpackError as exc:
+            # e.g. an edgeless graph, whose zero matrix leaves ARPACK no starting vector
+            raise nx.NetworkXError(f"ARPACK HITS failed: {exc}") from exc
+        authorities = vt.flatten().real
+        return self._normalized_hits(adjacency @ authorities, authorities)
+    
+    @staticmethod
+    def _normalized_hits(hubs: np.ndarray, authorities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Hub and authority scores scaled to sum to 1; all-zero scores cannot be"""
+        hubs_total = hubs.sum()
+        authorities_total = authorities.sum()
+        if hubs_total == 0 or authorities_total == 0:
+            raise nx.NetworkXError("HITS scores are all zero")
+        return hubs / hubs_total, authorities / authorities_total
+    
+    def _undirected_structure(self, graph: nx.DiGraph) -> nx.Graph:
+        """
+        Undirected copy of the graph's structure only
+        
+        Unlike graph.to_undirected() this does not deep-copy node and edge
+        attributes, which the structural analyses never read.
+        """
+        undirected_graph = nx.Graph()
+        undirected_graph.add_nodes_from(graph)
+        undirected_graph.add_edges_from(graph.edges())
+        return undirected_graph
+    
+    def _analyze_clustering(self, graph: nx.DiGraph, ig_graph: Optional['ig.Graph'] = None,
+                            structure_key: Optional[bytes] = None) -> Dict:
+        """Analyze clustering and community structure of the undirected graph"""
         try:
-            # Convert to undirected for clustering analysis
-            undirected_graph = graph.to_undirected()
-            
             clustering_analysis = {}
             
-            # Global clustering coefficient
-            clustering_analysis['global_clustering'] = nx.average_clustering(undirected_graph)
+            if ig_graph is not None:
+                undirected_ig = ig_graph.as_undirected()
+                undirected_ig.simplify()
+                nodelist = list(graph)
+                local_clustering = dict(zip(nodelist, undirected_ig.transitivity_local_undirected(mode='zero')))
+            else:
+                undirected_graph = self._undirected_structure(graph)
+                local_clustering = nx.clustering(undirected_graph)
             
             # Local clustering coefficients
-            clustering_analysis['local_clustering'] = nx.clustering(undirected_graph)
+            clustering_analysis['local_clustering'] = local_clustering
             
-            # Average local clustering
-            clustering_analysis['average_local_clustering'] = np.mean(list(clustering_analysis['local_clustering'].values())) if clustering_analysis['local_clustering'] else 0
+            # Average local clustering; this is also the global (average) clustering coefficient
+            average_clustering = float(np.mean(list(local_clustering.values()))) if local_clustering else 0
+            clustering_analysis['global_clustering'] = average_clustering
+            clustering_analysis['average_local_clustering'] = average_clustering
             
             # Community detection using Louvain method
-            try:
-                from community import community_louvain
-                communities = community_louvain.best_partition(undirected_graph)
+            def louvain() -> Optional[Dict]:
+                if ig_graph is not None:
+                    return dict(zip(nodelist, undirected_ig.community_multilevel().membership))
+                try:
+                    from community import community_louvain
+                except ImportError:
+                    return None
+                return community_louvain.best_partition(undirected_graph)
+            
+            communities = self._memoized(structure_key, 'communities', louvain)
+            
+            if communities is not None:
                 clustering_analysis['communities'] = communities
                 clustering_analysis['number_of_communities'] = len(set(communities.values()))
                 
@@ -152,8 +669,7 @@ class GraphAnalyticsService:
                 for node, community in communities.items():
                     community_sizes[community] += 1
                 clustering_analysis['community_sizes'] = dict(community_sizes)
-                
-            except ImportError:
+            else:
                 clustering_analysis['communities'] = {}
                 clustering_analysis['number_of_communities'] = 0
                 clustering_analysis['community_sizes'] = {}
@@ -164,51 +680,44 @@ class GraphAnalyticsService:
             logger.error(f"Error analyzing clustering: {e}")
             return {}
     
-    def _analyze_paths(self, graph: nx.DiGraph) -> Dict:
+    def _analyze_paths(self, nodelist: List, adjacency: sp.sparse.csr_array, strong_components: List[set],
+                       distances: Optional[np.ndarray] = None) -> Dict:
         """Analyze path properties and distances"""
         try:
             path_analysis = {}
             
-            # Check if graph is strongly connected
-            if nx.is_strongly_connected(graph):
-                # Average shortest path length
-                try:
-                    path_analysis['average_shortest_path'] = nx.average_shortest_path_length(graph)
-                except:
-                    path_analysis['average_shortest_path'] = None
-                
-                # Diameter
-                try:
-                    path_analysis['diameter'] = nx.diameter(graph)
-                except:
-                    path_analysis['diameter'] = None
+            # Distances are analyzed on the largest strongly connected component,
+            # which is the whole graph when it is strongly connected. Shortest
+            # paths between its nodes never leave it, so whole-graph distances
+            # can be sliced down to it. Only each node's distance total and
+            # maximum are kept, so large components never need a full matrix.
+            largest_cc = max(strong_components, key=len)
+            component = np.array(sorted(i for i, node in enumerate(nodelist) if node in largest_cc))
+            if distances is not None:
+                component_distances = distances[np.ix_(component, component)]
+                totals, maxima = component_distances.sum(axis=1), component_distances.max(axis=1)
             else:
-                # For disconnected graphs, analyze largest component
-                largest_cc = max(nx.strongly_connected_components(graph), key=len)
-                if len(largest_cc) > 1:
-                    subgraph = graph.subgraph(largest_cc)
-                    try:
-                        path_analysis['average_shortest_path'] = nx.average_shortest_path_length(subgraph)
-                        path_analysis['diameter'] = nx.diameter(subgraph)
-                    except:
-                        path_analysis['average_shortest_path'] = None
-                        path_analysis['diameter'] = None
-                else:
-                    path_analysis['average_shortest_path'] = None
-                    path_analysis['diameter'] = None
+                component_adjacency = adjacency[component][:, component]
+                blocks = [
+                    (block.sum(axis=1), block.max(axis=1))
+                    for block in _distance_blocks(component_adjacency, np.arange(len(component)))
+                ]
+                totals, maxima = (np.concatenate(parts) for parts in zip(*blocks))
+            size = len(component)
+            
+            if len(strong_components) == 1 or size > 1:
+                path_analysis['average_shortest_path'] = float(totals.sum() / (size * (size - 1))) if size > 1 else 0
+                path_analysis['diameter'] = int(maxima.max())
+            else:
+                path_analysis['average_shortest_path'] = None
+                path_analysis['diameter'] = None
             
             # Eccentricity (for largest component)
-            try:
-                largest_cc = max(nx.strongly_connected_components(graph), key=len)
-                if len(largest_cc) > 1:
-                    subgraph = graph.subgraph(largest_cc)
-                    eccentricity = nx.eccentricity(subgraph)
-                    path_analysis['eccentricity'] = eccentricity
-                    path_analysis['radius'] = min(eccentricity.values())
-                else:
-                    path_analysis['eccentricity'] = {}
-                    path_analysis['radius'] = None
-            except:
+            if size > 1:
+                eccentricity = maxima.astype(np.int64)
+                path_analysis['eccentricity'] = dict(zip((nodelist[i] for i in component.tolist()), eccentricity.tolist()))
+                path_analysis['radius'] = int(eccentricity.min())
+            else:
                 path_analysis['eccentricity'] = {}
                 path_analysis['radius'] = None
             
@@ -218,49 +727,46 @@ class GraphAnalyticsService:
             logger.error(f"Error analyzing paths: {e}")
             return {}
     
-    def _analyze_network_structure(self, graph: nx.DiGraph) -> Dict:
+    def _analyze_network_structure(self, graph: nx.DiGraph, in_degrees: np.ndarray, out_degrees: np.ndarray) -> Dict:
         """Analyze network structure and properties"""
         try:
             structure_analysis = {}
             
             # Degree distribution
-            degrees = [d for n, d in graph.degree()]
+            degrees = in_degrees + out_degrees
             structure_analysis['degree_distribution'] = {
-                'mean': np.mean(degrees),
-                'median': np.median(degrees),
-                'std': np.std(degrees),
-                'min': min(degrees) if degrees else 0,
-                'max': max(degrees) if degrees else 0
+                'mean': float(np.mean(degrees)),
+                'median': float(np.median(degrees)),
+                'std': float(np.std(degrees)),
+                'min': int(degrees.min()) if degrees.size else 0,
+                'max': int(degrees.max()) if degrees.size else 0
             }
             
             # Assortativity (degree correlation)
             try:
                 structure_analysis['assortativity'] = nx.degree_assortativity_coefficient(graph)
-            except:
+            except (nx.NetworkXException, ValueError, ZeroDivisionError):
                 structure_analysis['assortativity'] = None
             
-            # Reciprocity (for directed graphs)
+            # Reciprocity (for directed graphs); undefined for empty graphs
             try:
                 structure_analysis['reciprocity'] = nx.reciprocity(graph)
-            except:
+            except nx.NetworkXError:
                 structure_analysis['reciprocity'] = None
             
             # Transitivity
             try:
                 structure_analysis['transitivity'] = nx.transitivity(graph)
-            except:
+            except nx.NetworkXException:
                 structure_analysis['transitivity'] = None
             
-            # Node types analysis
-            in_degrees = dict(graph.in_degree())
-            out_degrees = dict(graph.out_degree())
-            
             # Identify hubs (high out-degree) and authorities (high in-degree)
-            avg_out_degree = np.mean(list(out_degrees.values()))
-            avg_in_degree = np.mean(list(in_degrees.values()))
+            avg_out_degree = float(np.mean(out_degrees))
+            avg_in_degree = float(np.mean(in_degrees))
             
-            hubs = [node for node, degree in out_degrees.items() if degree > avg_out_degree * 1.5]
-            authorities = [node for node, degree in in_degrees.items() if degree > avg_in_degree * 1.5]
+            nodes = list(graph)
+            hubs = [nodes[i] for i in np.flatnonzero(out_degrees > avg_out_degree * 1.5).tolist()]
+            authorities = [nodes[i] for i in np.flatnonzero(in_degrees > avg_in_degree * 1.5).tolist()]
             
             structure_analysis['node_types'] = {
                 'hubs': hubs,
@@ -275,7 +781,8 @@ class GraphAnalyticsService:
             logger.error(f"Error analyzing network structure: {e}")
             return {}
     
-    def _generate_research_insights(self, graph: nx.DiGraph, centrality_measures: Dict) -> Dict:
+    def _generate_research_insights(self, graph: nx.DiGraph, centrality_measures: Dict, in_degrees: np.ndarray, out_degrees: np.ndarray,
+                                    weak_components: List[set]) -> Dict:
         """Generate research insights and recommendations"""
         try:
             insights = {}
@@ -290,26 +797,22 @@ class GraphAnalyticsService:
                 bridge_papers = sorted(centrality_measures['betweenness_centrality'].items(), key=lambda x: x[1], reverse=True)[:5]
                 insights['bridge_papers'] = bridge_papers
             
-            # Emerging topics (high out-degree, low in-degree)
-            in_degrees = dict(graph.in_degree())
-            out_degrees = dict(graph.out_degree())
-            
-            emerging_topics = []
-            for node in graph.nodes():
-                if out_degrees.get(node, 0) > 2 and in_degrees.get(node, 0) <= 1:
-                    emerging_topics.append((node, out_degrees.get(node, 0), in_degrees.get(node, 0)))
+            nodes = list(graph)
             
-            emerging_topics.sort(key=lambda x: x[1], reverse=True)
-            insights['emerging_topics'] = emerging_topics[:5]
+            # Emerging topics (high out-degree, low in-degree), highest out-degree first
+            emerging = np.flatnonzero((out_degrees > 2) & (in_degrees <= 1))
+            emerging = emerging[np.argsort(-out_degrees[emerging], kind='stable')[:5]]
+            insights['emerging_topics'] = [
+                (nodes[i], out_degree, in_degree)
+                for i, out_degree, in_degree in zip(emerging.tolist(), out_degrees[emerging].tolist(), in_degrees[emerging].tolist())
+            ]
             
             # Research gaps (isolated or poorly connected nodes)
-            isolated_nodes = list(nx.isolates(graph))
-            insights['isolated_nodes'] = isolated_nodes
+            insights['isolated_nodes'] = [nodes[i] for i in np.flatnonzero(in_degrees + out_degrees == 0).tolist()]
             
             # Well-connected clusters
-            if graph.number_of_nodes() > 0:
-                components = list(nx.weakly_connected_components(graph))
-                well_connected = [comp for comp in components if len(comp) >= 3]
+            if weak_components:
+                well_connected = [comp for comp in weak_components if len(comp) >= 3]
                 insights['well_connected_clusters'] = [list(comp) for comp in well_connected[:3]]
             
             return insights
@@ -318,17 +821,18 @@ class GraphAnalyticsService:
             logger.error(f"Error generating research insights: {e}")
             return {}
     
-    def _generate_summary(self, graph: nx.DiGraph, centrality_measures: Dict, clustering_analysis: Dict) -> Dict:
+    def _generate_summary(self, n: int, m: int, density: float, centrality_measures: Dict, clustering_analysis: Dict,
+                          weak_components: List[set]) -> Dict:
         """Generate a summary of key findings"""
         try:
             summary = {}
             
             # Key metrics summary
             summary['key_metrics'] = {
-                'total_articles': graph.number_of_nodes(),
-                'total_connections': graph.number_of_edges(),
-                'network_density': nx.density(graph),
-                'is_connected': nx.is_weakly_connected(graph)
+                'total_articles': n,
+                'total_connections': m,
+                'network_density': density,
+                'is_connected': len(weak_components) == 1
             }
             
             # Top papers by different measures
@@ -353,7 +857,7 @@ class GraphAnalyticsService:
             logger.error(f"Error generating summary: {e}")
             return {}
     
-    def get_node_analytics(self, graph: nx.DiGraph, node_id: str) -> Dict:
+    def get_node_analytics(self, graph: nx.DiGraph, node_id: int) -> Dict:
         """Get detailed analytics for a specific node"""
         try:
             if node_id not in graph.nodes():
@@ -369,8 +873,8 @@ class GraphAnalyticsService:
                 'successors': list(graph.successors(node_id))
             }
             
-            # Add centrality measures if available
-            centrality_measures = self._calculate_centrality_measures(graph)
+            # Add centrality measures if available, reusing the cached analysis
+            centrality_measures = self.analyze_graph(graph).get('centrality_measures', {})
             
             for measure_name, measures in centrality_measures.items():
                 if node_id in measures:
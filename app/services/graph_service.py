@@ -1,10 +1,16 @@
 import networkx as nx
+import aiohttp
 import asyncio
-import json
-from typing import Dict, List, Set, Optional
+import httpx
+from collections import Counter, OrderedDict, deque
+from typing import Dict, Iterator, List, Set, Optional, Tuple, Union
 from datetime import datetime
 import logging
+import threading
+from app.core.config import GRAPH_MEMORY_LIMIT, GRAPH_STORE_DIR
+from .graph_store import GraphStore
 from .pubmed_service import PubMedService
+from .response_cache import ResponseCache
 from .analytics_service import GraphAnalyticsService
 
 logger = logging.getLogger(__name__)
@@ -12,14 +18,40 @@ logger = logging.getLogger(__name__)
 class GraphService:
     """Service for building and managing PubMed knowledge graphs"""
     
-    def __init__(self):
-        self.pubmed_service = PubMedService()
+    TERMINAL_STATUSES = ('completed', 'completed_with_limit')
+    CLOSED_STATUSES = TERMINAL_STATUSES + ('error', 'deleted')  # No status follows these
+    
+    def __init__(self, store: Optional[GraphStore] = None,
+                 session: Optional[Union[httpx.AsyncClient, aiohttp.ClientSession]] = None,
+                 cache: Optional[ResponseCache] = None):
+        # Opens its own session and the configured response cache unless given them
+        self.pubmed_service = PubMedService(cache=cache, session=session)
         self.analytics_service = GraphAnalyticsService()
-        self.graphs = {}  # Store multiple graphs by ID
+        # Completed graphs are persisted here and reloaded on demand
+        self.store = store if store is not None else GraphStore(GRAPH_STORE_DIR)
+        self.graphs = OrderedDict()  # Graphs in memory by ID, least recently used first
+        self.MAX_GRAPHS_IN_MEMORY = GRAPH_MEMORY_LIMIT  # Completed graphs kept loaded
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}  # Status event queues by graph ID
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # Loop the subscribers' queues belong to
+        self._data_cache: Dict[str, Tuple[Tuple, Dict]] = {}  # Visualization payloads of completed graphs
+        self._stored_rows: Dict[str, Dict] = {}  # list_graphs rows of graphs only on disk
+        self._saved: Set[str] = set()  # IDs of graphs in memory that are also in the store, so evictable
+        # Route handlers run in the threadpool while builds run on the event
+        # loop; guards the four members above and mutation of building graphs
+        self._lock = threading.Lock()
         self.MAX_ARTICLES = 50  # Limit to prevent overwhelming the API
+        self.MAX_CONCURRENT_FETCHES = 5  # Batched requests in flight within a BFS level
+        self.FETCH_BATCH_SIZE = 100  # Articles per batched details request
+        self.TITLE_SHORT_LENGTH = 50  # Characters kept in a node's title_short
+        
+    def create_graph(self, graph_id: str, seed_pmid: int) -> Dict:
+        """
+        Create a new knowledge graph
         
-    def create_graph(self, graph_id: str, seed_pmid: str) -> Dict:
-        """Create a new knowledge graph"""
+        PMIDs are kept as ints throughout the graph (cheaper to hash and store
+        than strings) and only turned back into strings for the frontend.
+        """
+        seed_pmid = int(seed_pmid)
         graph = nx.DiGraph()
         graph.graph['id'] = graph_id
         graph.graph['seed_pmid'] = seed_pmid
@@ -27,214 +59,448 @@ class GraphService:
         graph.graph['status'] = 'initializing'
         graph.graph['total_articles'] = 0
         graph.graph['processed_articles'] = 0
+        graph.graph['total_relationships'] = 0
+        graph.graph['completed_at'] = None
+        graph.graph['limit_reached'] = False
+        graph.graph['version'] = 0  # Bumped on every mutation; keys cached analytics
         
-        self.graphs[graph_id] = graph
+        with self._lock:
+            self._remember(graph)
         return {
             'graph_id': graph_id,
-            'seed_pmid': seed_pmid,
+            'seed_pmid': str(seed_pmid),
             'status': 'initializing'
         }
     
     async def build_graph(self, graph_id: str, max_depth: int = 3) -> Dict:
         """Build the knowledge graph - only direct references and citations of seed article"""
-        if graph_id not in self.graphs:
+        graph = self._get_graph(graph_id)
+        if graph is None:
             raise ValueError(f"Graph {graph_id} not found")
         
-        graph = self.graphs[graph_id]
         seed_pmid = graph.graph['seed_pmid']
         
-        print(f"\n🚀 Starting graph construction for PMID {seed_pmid}")
-        print("=" * 60)
+        logger.info("Starting graph construction for PMID %s", seed_pmid)
         
         # Initialize tracking sets
-        processed_pmids = set()
-        to_process = [(seed_pmid, 0)]  # (pmid, depth)
+        processed = 0  # Articles taken off the frontier; seen already rules out repeats
+        seen: Set[int] = {seed_pmid}  # Everything ever enqueued, so the queue holds no duplicates
+        frontier = deque([seed_pmid])  # Articles waiting to be fetched, in BFS order
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
         
         graph.graph['status'] = 'building'
+        self._publish(graph)
         
-        while to_process and len(processed_pmids) < self.MAX_ARTICLES:
-            current_pmid, current_depth = to_process.pop(0)
-            
-            if current_pmid in processed_pmids:
-                continue
-                
-            processed_pmids.add(current_pmid)
-            graph.graph['processed_articles'] += 1
-            
-            print(f"\n📊 Processing article {len(processed_pmids)}/{self.MAX_ARTICLES}")
-            
-            try:
-                # Get article details and relationships
-                article_details, relationships = await asyncio.gather(
-                    self.pubmed_service.get_article_details(current_pmid),
-                    self.pubmed_service.get_article_relationships(current_pmid)
-                )
-                
-                # Add node to graph
-                if article_details:
-                    graph.add_node(current_pmid, **article_details)
-                else:
-                    # Add placeholder node if details not available
-                    graph.add_node(current_pmid, pmid=current_pmid, title=f"PMID: {current_pmid}")
-                
-                # Only add direct connections for the seed article (Layer 1)
-                if current_pmid == seed_pmid:
-                    print(f"🔗 Adding direct connections for seed article...")
+        async def fetch_slice(pmids: List[int]):
+            """Fetch details for a slice of articles, plus the seed's relationships"""
+            async with semaphore:
+                try:
+                    if seed_pmid in pmids:
+                        return await asyncio.gather(
+                            self.pubmed_service.get_article_details_batch(pmids),
+                            self.pubmed_service.get_article_relationships_batch([seed_pmid])
+                        )
+                    # Only the seed's relationships become edges
+                    return await self.pubmed_service.get_article_details_batch(pmids), {}
+                finally:
+                    graph.graph['processed_articles'] += len(pmids)
+                    self._publish(graph)
+        
+        try:
+            # One pooled HTTP session for the whole crawl
+            async with self.pubmed_service:
+                while frontier and processed < self.MAX_ARTICLES and graph.graph['status'] != 'deleted':
+                    # Fetch the whole level in batched requests, up to the article limit
+                    batch = [frontier.popleft() for _ in range(min(len(frontier), self.MAX_ARTICLES - processed))]
+                    processed += len(batch)
+                    slices = [batch[i:i + self.FETCH_BATCH_SIZE] for i in range(0, len(batch), self.FETCH_BATCH_SIZE)]
                     
-                    # Add edges for references (this article cites others)
-                    for ref_pmid in relationships['references']:
-                        if len(processed_pmids) < self.MAX_ARTICLES:
-                            graph.add_edge(current_pmid, ref_pmid, relationship_type='cites')
-                            if ref_pmid not in processed_pmids:
-                                to_process.append((ref_pmid, 1))
+                    logger.debug("Processing %d articles (%d/%d)", len(batch), processed, self.MAX_ARTICLES)
                     
-                    # Add edges for citations (other articles cite this one)
-                    for citation_pmid in relationships['citations']:
-                        if len(processed_pmids) < self.MAX_ARTICLES:
-                            graph.add_edge(citation_pmid, current_pmid, relationship_type='cited_by')
-                            if citation_pmid not in processed_pmids:
-                                to_process.append((citation_pmid, 1))
-                
-                # Update total count
-                graph.graph['total_articles'] = len(graph.nodes())
-                
-                # Small delay to be respectful to the API
-                await asyncio.sleep(0.2)
-                
-            except Exception as e:
-                logger.error(f"Error processing PMID {current_pmid}: {e}")
-                print(f"❌ Error processing PMID {current_pmid}: {e}")
-                continue
+                    results = await asyncio.gather(*(fetch_slice(pmids) for pmids in slices), return_exceptions=True)
+                    
+                    nodes = []
+                    edges = []
+                    for pmids, result in zip(slices, results):
+                        if isinstance(result, Exception):
+                            logger.error(f"Error processing PMIDs {', '.join(map(str, pmids))}: {result}")
+                            continue
+                        
+                        details, relationships = result
+                        
+                        # Placeholder attributes if details are not available; the
+                        # truncated title is stored once here rather than sliced per display
+                        for pmid in pmids:
+                            article = details.get(pmid) or {'pmid': pmid, 'title': f"PMID: {pmid}"}
+                            nodes.append((pmid, {**article, 'title_short': article['title'][:self.TITLE_SHORT_LENGTH]}))
+                        
+                        # Only add direct connections for the seed article (Layer 1)
+                        for current_pmid, links in relationships.items():
+                            # References (this article cites others), then citations (other articles cite this one)
+                            edges.extend((current_pmid, ref_pmid, {'relationship_type': 'cites'}) for ref_pmid in links['references'])
+                            edges.extend((citation_pmid, current_pmid, {'relationship_type': 'cited_by'}) for citation_pmid in links['citations'])
+                            for linked_pmid in (*links['references'], *links['citations']):
+                                if linked_pmid not in seen:
+                                    seen.add(linked_pmid)
+                                    frontier.append(linked_pmid)
+                    
+                    with self._lock:
+                        graph.add_nodes_from(nodes)
+                        graph.add_edges_from(edges)
+                        
+                        # Update total count
+                        graph.graph['total_articles'] = graph.number_of_nodes()
+                        graph.graph['total_relationships'] = graph.number_of_edges()
+                        graph.graph['version'] += 1
+                    self._publish(graph)
+        except Exception:
+            # Close status streams with the failure instead of leaving them waiting
+            with self._lock:
+                if graph.graph['status'] != 'deleted':
+                    graph.graph['status'] = 'error'
+            self._publish(graph)
+            raise
         
-        # Check if we hit the limit
-        if len(processed_pmids) >= self.MAX_ARTICLES:
-            graph.graph['status'] = 'completed_with_limit'
-            graph.graph['limit_reached'] = True
-            print(f"\n⚠️  Reached maximum article limit ({self.MAX_ARTICLES})")
-        else:
-            graph.graph['status'] = 'completed'
-            print(f"\n✅ Completed processing all available articles")
+        # Check for deletion and set the final status in one step, so a
+        # delete_graph in between cannot be overwritten
+        with self._lock:
+            if graph.graph['status'] == 'deleted':
+                logger.info("Graph %s was deleted during construction", graph_id)
+                return self._build_result(graph)
             
-        graph.graph['completed_at'] = datetime.now().isoformat()
-        
-        # Print final summary
-        print("\n" + "=" * 60)
-        print("📈 GRAPH CONSTRUCTION SUMMARY")
-        print("=" * 60)
-        print(f"🎯 Seed PMID: {seed_pmid}")
-        print(f"📊 Total Articles: {graph.graph['total_articles']}")
-        print(f"🔗 Total Relationships: {len(graph.edges())}")
-        print(f"📖 References: {len([e for e in graph.edges(data=True) if e[2].get('relationship_type') == 'cites'])}")
-        print(f"📚 Citations: {len([e for e in graph.edges(data=True) if e[2].get('relationship_type') == 'cited_by'])}")
-        print(f"⏱️  Status: {graph.graph['status']}")
-        print("=" * 60)
+            # Check if we hit the limit
+            if processed >= self.MAX_ARTICLES:
+                graph.graph['status'] = 'completed_with_limit'
+                graph.graph['limit_reached'] = True
+                logger.debug("Reached maximum article limit (%d)", self.MAX_ARTICLES)
+            else:
+                graph.graph['status'] = 'completed'
+                logger.debug("Completed processing all available articles")
+                
+            graph.graph['completed_at'] = datetime.now().isoformat()
+        self._publish(graph)
+        
+        # Warm the analytics cache off the event loop
+        try:
+            await self.analytics_service.precompute(graph)
+        except Exception as e:
+            logger.error(f"Error precomputing analytics for graph {graph_id}: {e}")
+        
+        # Persist the finished graph, unless it was deleted meanwhile; only
+        # then may it leave memory
+        if graph.graph['status'] != 'deleted':
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.store.save, graph)
+            except OSError as e:
+                logger.error(f"Error storing graph {graph_id}: {e}")
+            else:
+                with self._lock:
+                    deleted = graph.graph['status'] == 'deleted'
+                    if not deleted:
+                        self._saved.add(graph_id)
+                        self._evict()
+                if deleted:
+                    # Deleted while it was being written
+                    self.store.delete(graph_id)
+        if graph.graph['status'] == 'deleted':
+            # delete_graph ran meanwhile; drop what precompute cached after it
+            self.analytics_service.invalidate(graph_id)
+        
+        # Log a final summary, tallying relationship types in one pass over the edges
+        relationship_counts = Counter(relationship_type for _, _, relationship_type in graph.edges(data='relationship_type'))
+        total_relationships = graph.graph['total_relationships']
+        summary = {
+            'seed_pmid': seed_pmid,
+            'total_articles': graph.graph['total_articles'],
+            'total_relationships': total_relationships,
+            'references': relationship_counts['cites'],
+            'citations': relationship_counts['cited_by'],
+            'status': graph.graph['status']
+        }
+        logger.info(
+            "Graph %s built: %d articles, %d relationships (%d references, %d citations), status %s",
+            graph_id, summary['total_articles'], total_relationships,
+            summary['references'], summary['citations'], summary['status'], extra=summary
+        )
         
+        return self._build_result(graph)
+    
+    @staticmethod
+    def _build_result(graph: nx.DiGraph) -> Dict:
         return {
-            'graph_id': graph_id,
+            'graph_id': graph.graph['id'],
             'status': graph.graph['status'],
             'total_articles': graph.graph['total_articles'],
-            'total_relationships': len(graph.edges()),
-            'limit_reached': graph.graph.get('limit_reached', False)
+            'total_relationships': graph.graph['total_relationships'],
+            'limit_reached': graph.graph['limit_reached']
         }
     
+    def _remember(self, graph: nx.DiGraph) -> None:
+        """Hold a graph in memory as the most recently used; call with _lock held"""
+        self.graphs[graph.graph['id']] = graph
+        self.graphs.move_to_end(graph.graph['id'])
+        self._evict()
+    
+    def _evict(self) -> None:
+        """
+        Drop the least recently used stored graphs beyond MAX_GRAPHS_IN_MEMORY
+        
+        Only graphs already written to the store count: a finished graph
+        stays in memory until build_graph has saved it. Payloads and
+        analytics cached for a dropped graph go with it, so those caches stay
+        bounded too. Call with _lock held.
+        """
+        saved = [graph_id for graph_id in self.graphs if graph_id in self._saved]
+        for graph_id in saved[:max(len(saved) - self.MAX_GRAPHS_IN_MEMORY, 0)]:
+            del self.graphs[graph_id]
+            self._saved.discard(graph_id)
+            self._data_cache.pop(graph_id, None)
+            self.analytics_service.invalidate(graph_id)
+    
+    def _get_graph(self, graph_id: str) -> Optional[nx.DiGraph]:
+        """Graph by ID from memory, reloading it from the store if it was evicted"""
+        with self._lock:
+            graph = self.graphs.get(graph_id)
+            if graph is not None:
+                self.graphs.move_to_end(graph_id)
+                return graph
+        
+        # Unpickle outside the lock; another thread may reload it meanwhile
+        graph = self.store.load(graph_id)
+        if graph is None:
+            return None
+        with self._lock:
+            if graph_id in self.graphs:
+                graph = self.graphs[graph_id]
+                self.graphs.move_to_end(graph_id)
+            else:
+                self._saved.add(graph_id)
+                self._remember(graph)
+        return graph
+    
+    def _snapshot(self, graph_id: str) -> Optional[nx.DiGraph]:
+        """
+        Graph by ID for reading off the event loop
+        
+        A graph still building is copied under the lock, so readers never
+        iterate it while build_graph adds to it; finished graphs no longer
+        change and are returned as is.
+        """
+        graph = self._get_graph(graph_id)
+        if graph is None or graph.graph['status'] in self.TERMINAL_STATUSES:
+            return graph
+        with self._lock:
+            return graph.copy()
+    
     def get_graph_data(self, graph_id: str) -> Optional[Dict]:
-        """Get graph data for visualization"""
-        if graph_id not in self.graphs:
+        """
+        Get graph data for visualization
+        
+        Nodes and edges are columnar: one list per field, aligned by index, so
+        field names are not repeated for every record. A completed graph no
+        longer changes, so its payload is built once and reused until the
+        graph is deleted or its status or version moves on.
+        """
+        graph = self._snapshot(graph_id)
+        if graph is None:
             return None
         
-        graph = self.graphs[graph_id]
-        
-        # Convert to format suitable for frontend visualization
-        nodes = []
-        for pmid, data in graph.nodes(data=True):
-            nodes.append({
-                'id': pmid,
-                'title': data.get('title', f'PMID: {pmid}'),
-                'authors': data.get('authors', []),
-                'journal': data.get('journal', ''),
-                'pubdate': data.get('pubdate', ''),
-                'is_seed': pmid == graph.graph['seed_pmid']
-            })
-        
-        edges = []
-        for source, target, data in graph.edges(data=True):
-            edges.append({
-                'source': source,
-                'target': target,
-                'type': data.get('relationship_type', 'unknown')
-            })
+        stamp = (graph.graph['status'], graph.graph['version'])
+        with self._lock:
+            cached = self._data_cache.get(graph_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
         
+        data = self._graph_data(graph)
+        for part in ('nodes', 'edges'):
+            data[part] = {column: list(values) for column, values in data[part].items()}
+        if graph.graph['status'] in self.TERMINAL_STATUSES:
+            with self._lock:
+                if graph_id in self.graphs:
+                    self._data_cache[graph_id] = (stamp, data)
+        return data
+    
+    def iter_graph_data(self, graph_id: str) -> Optional[Dict]:
+        """Graph data for visualization as lazy columns, for streaming without building the lists"""
+        graph = self._snapshot(graph_id)
+        if graph is None:
+            return None
+        return self._graph_data(graph)
+    
+    def _graph_data(self, graph: nx.DiGraph) -> Dict:
+        return {
+            'nodes': self._node_columns(graph),
+            'edges': self._edge_columns(graph),
+            'metadata': self._metadata(graph)
+        }
+    
+    @staticmethod
+    def _node_columns(graph: nx.DiGraph) -> Dict[str, Iterator]:
+        """Lazy per-field columns of the graph nodes, in node order"""
+        nodes = graph.nodes
         return {
-            'nodes': nodes,
-            'edges': edges,
-            'metadata': {
-                'graph_id': graph_id,
-                'seed_pmid': graph.graph['seed_pmid'],
-                'status': graph.graph['status'],
-                'total_articles': graph.graph['total_articles'],
-                'total_relationships': len(edges),
-                'created_at': graph.graph['created_at'],
-                'completed_at': graph.graph.get('completed_at'),
-                'limit_reached': graph.graph.get('limit_reached', False)
-            }
+            'id': (str(pmid) for pmid in nodes),
+            'title': (f'PMID: {pmid}' if title is None else title for pmid, title in nodes(data='title')),
+            'authors': (authors for _, authors in nodes(data='authors', default=[])),
+            'journal': (journal for _, journal in nodes(data='journal', default='')),
+            'pubdate': (pubdate for _, pubdate in nodes(data='pubdate', default=''))
+        }
+    
+    @staticmethod
+    def _edge_columns(graph: nx.DiGraph) -> Dict[str, Iterator]:
+        """Lazy per-field columns of the graph edges, in edge order"""
+        edges = graph.edges
+        return {
+            'source': (str(source) for source, _ in edges),
+            'target': (str(target) for _, target in edges),
+            'type': (edge_type for _, _, edge_type in edges(data='relationship_type', default='unknown'))
+        }
+    
+    @staticmethod
+    def _metadata(graph: nx.DiGraph) -> Dict:
+        """The metadata block that accompanies graph data, with the PMID as a string like the node IDs"""
+        return {
+            'graph_id': graph.graph['id'],
+            'seed_pmid': str(graph.graph['seed_pmid']),
+            'status': graph.graph['status'],
+            'total_articles': graph.graph['total_articles'],
+            'total_relationships': graph.graph['total_relationships'],
+            'created_at': graph.graph['created_at'],
+            'completed_at': graph.graph['completed_at'],
+            'limit_reached': graph.graph['limit_reached']
         }
     
     def get_graph_status(self, graph_id: str) -> Optional[Dict]:
         """Get current status of a graph"""
-        if graph_id not in self.graphs:
+        graph = self._get_graph(graph_id)
+        if graph is None:
             return None
         
-        graph = self.graphs[graph_id]
+        return self._status(graph)
+    
+    @staticmethod
+    def _status(graph: nx.DiGraph) -> Dict:
         return {
-            'graph_id': graph_id,
+            'graph_id': graph.graph['id'],
             'status': graph.graph['status'],
             'total_articles': graph.graph['total_articles'],
             'processed_articles': graph.graph['processed_articles'],
             'created_at': graph.graph['created_at'],
-            'completed_at': graph.graph.get('completed_at'),
-            'limit_reached': graph.graph.get('limit_reached', False)
+            'completed_at': graph.graph['completed_at'],
+            'limit_reached': graph.graph['limit_reached']
         }
     
+    def subscribe(self, graph_id: str) -> Optional[asyncio.Queue]:
+        """
+        Queue of status updates for a graph, starting with its current status
+        
+        The build pushes a status whenever progress is made, so clients can
+        follow it instead of polling get_graph_status. A failed build or a
+        deletion pushes a final 'error' or 'deleted' status; nothing follows
+        a status in CLOSED_STATUSES. Pass the queue to unsubscribe once done
+        with it.
+        """
+        graph = self._get_graph(graph_id)
+        if graph is None:
+            return None
+        
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        queue.put_nowait(self._status(graph))
+        self._subscribers.setdefault(graph_id, []).append(queue)
+        return queue
+    
+    def unsubscribe(self, graph_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(graph_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self._subscribers.pop(graph_id, None)
+    
+    def _publish(self, graph: nx.DiGraph) -> None:
+        """Push the current status of a graph to its subscribers"""
+        queues = self._subscribers.get(graph.graph['id'])
+        if queues:
+            status = self._status(graph)
+            for queue in queues:
+                queue.put_nowait(status)
+    
     def list_graphs(self) -> List[Dict]:
-        """List all graphs"""
-        return [
-            {
-                'graph_id': graph_id,
-                'seed_pmid': graph.graph['seed_pmid'],
-                'status': graph.graph['status'],
-                'total_articles': graph.graph['total_articles'],
-                'created_at': graph.graph['created_at']
-            }
-            for graph_id, graph in self.graphs.items()
-        ]
+        """List all graphs, in memory and stored"""
+        with self._lock:
+            rows = {graph_id: self._list_row(graph) for graph_id, graph in self.graphs.items()}
+        for graph_id in self.store.ids():
+            if graph_id in rows:
+                continue
+            # Stored graphs are complete, so each is unpickled at most once for its row
+            with self._lock:
+                row = self._stored_rows.get(graph_id)
+            if row is None:
+                graph = self.store.load(graph_id)
+                if graph is None:
+                    continue
+                row = self._list_row(graph)
+                with self._lock:
+                    self._stored_rows[graph_id] = row
+            rows[graph_id] = row
+        return list(rows.values())
+    
+    @staticmethod
+    def _list_row(graph: nx.DiGraph) -> Dict:
+        attributes = graph.graph
+        return {
+            'graph_id': attributes['id'],
+            'seed_pmid': str(attributes['seed_pmid']),
+            'status': attributes['status'],
+            'total_articles': attributes['total_articles'],
+            'created_at': attributes['created_at']
+        }
+    
+    def delete_graph(self, graph_id: str) -> bool:
+        """Delete a graph and anything cached for it"""
+        with self._lock:
+            graph = self.graphs.pop(graph_id, None)
+            in_memory = graph is not None
+            if in_memory:
+                # Tells a build still running on this graph to stop and not persist it
+                graph.graph['status'] = 'deleted'
+            self._saved.discard(graph_id)
+            self._data_cache.pop(graph_id, None)
+            self._stored_rows.pop(graph_id, None)
+        stored = self.store.delete(graph_id)
+        if in_memory and self._loop is not None:
+            # Runs in the threadpool; the queues are served by the event loop
+            self._loop.call_soon_threadsafe(self._publish, graph)
+        if not (in_memory or stored):
+            return False
+        
+        self.analytics_service.invalidate(graph_id)
+        return True
     
     def get_graph_analytics(self, graph_id: str) -> Optional[Dict]:
         """Get comprehensive analytics for a graph"""
-        if graph_id not in self.graphs:
+        graph = self._get_graph(graph_id)
+        if graph is None:
             return None
         
-        graph = self.graphs[graph_id]
-        
         # Only analyze completed graphs
-        if graph.graph.get('status') not in ['completed', 'completed_with_limit']:
+        if graph.graph['status'] not in self.TERMINAL_STATUSES:
             return {'error': 'Graph analysis only available for completed graphs'}
         
         try:
-            print(f"\n📊 Generating analytics for graph {graph_id}...")
+            logger.debug("Generating analytics for graph %s", graph_id)
             analytics = self.analytics_service.analyze_graph(graph)
-            print(f"✅ Analytics generated successfully")
             return analytics
         except Exception as e:
             logger.error(f"Error generating analytics for graph {graph_id}: {e}")
             return {'error': str(e)}
     
-    def get_node_analytics(self, graph_id: str, node_id: str) -> Optional[Dict]:
+    def get_node_analytics(self, graph_id: str, node_id: int) -> Optional[Dict]:
         """Get detailed analytics for a specific node in a graph"""
-        if graph_id not in self.graphs:
+        graph = self._snapshot(graph_id)
+        if graph is None:
             return None
         
-        graph = self.graphs[graph_id]
-        
         try:
             analytics = self.analytics_service.get_node_analytics(graph, node_id)
             return analytics
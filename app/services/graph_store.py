@@ -0,0 +1,55 @@
+import os
+import pickle
+from pathlib import Path
+from typing import Iterator, Optional
+import logging
+
+import networkx as nx
+
+logger = logging.getLogger(__name__)
+
+
+class GraphStore:
+    """On-disk store of completed graphs, one pickle file per graph ID"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, graph_id: str) -> Path:
+        # IDs come from request paths, so never let one step outside the directory
+        if not graph_id or Path(graph_id).name != graph_id:
+            raise FileNotFoundError(graph_id)
+        return self.directory / f"{graph_id}.pkl"
+
+    def save(self, graph: nx.DiGraph) -> None:
+        """Write a graph under its ID, replacing any earlier copy atomically"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(graph.graph['id'])
+        partial = path.with_suffix('.tmp')
+        with open(partial, 'wb') as f:
+            pickle.dump(graph, f, protocol=5)
+        os.replace(partial, path)
+
+    def load(self, graph_id: str) -> Optional[nx.DiGraph]:
+        """Stored graph for an ID, or None if there is none"""
+        try:
+            with open(self._path(graph_id), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.error(f"Error loading stored graph {graph_id}: {e}")
+            return None
+
+    def delete(self, graph_id: str) -> bool:
+        """Remove a stored graph, returning whether there was one"""
+        try:
+            self._path(graph_id).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def ids(self) -> Iterator[str]:
+        """IDs of all stored graphs"""
+        if self.directory.is_dir():
+            yield from (path.stem for path in self.directory.glob('*.pkl'))
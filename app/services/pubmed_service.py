@@ -1,54 +1,230 @@
 import asyncio
 import aiohttp
+import certifi
+import functools
+import httpx
+import io
+import orjson
+import ssl
 import time
-from typing import List, Dict, Optional, Set
-from urllib.parse import quote
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import urlencode
 import logging
 import random
+from app.core.config import (
+    NCBI_API_KEY, NCBI_EMAIL, NCBI_TOOL, PUBMED_CACHE_DIR, PUBMED_CACHE_DISABLE, PUBMED_CACHE_TTL,
+    PUBMED_HTTP_CLIENT
+)
+from .response_cache import ResponseCache
+
+try:
+    from lxml import etree as ET
+except ImportError:  # optional C parser; the stdlib ElementTree API is used without it
+    import xml.etree.ElementTree as ET
 
 logger = logging.getLogger(__name__)
 
+_LXML = hasattr(ET, 'LXML_VERSION')
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context(http_client: str) -> ssl.SSLContext:
+    """
+    SSL context for one HTTP client library, built once per process
+    
+    Loading the CA bundle is most of the cost of opening a session. Clients
+    do not share a context because they configure it: httpx sets its ALPN
+    protocols (h2) on it, which aiohttp would then advertise too.
+    """
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def _text_path(path: str) -> Callable[[Any], str]:
+    """Lookup of all text under the first element at path, or '' if there is none"""
+    if _LXML:
+        return ET.XPath(f"string({path})", smart_strings=False)
+    
+    def text(elem):
+        found = elem.find(path)
+        return ''.join(found.itertext()) if found is not None else ''
+    return text
+
+
+def _elements_path(path: str) -> Callable[[Any], List]:
+    """Lookup of all elements at path"""
+    if _LXML:
+        return ET.XPath(path)
+    return lambda elem: elem.findall(path)
+
+
+# Field lookups relative to a PubmedArticle, built once at import; compiled
+# XPath avoids lxml's per-call path handling
+_PMID = _text_path('MedlineCitation/PMID')
+_TITLE = _text_path('MedlineCitation/Article/ArticleTitle')
+_JOURNAL = _text_path('MedlineCitation/Article/Journal/Title')
+_DOI = _text_path("MedlineCitation/Article/ELocationID[@EIdType='doi']")
+_AUTHORS = _elements_path('MedlineCitation/Article/AuthorList/Author')
+_PUBDATE = _elements_path('MedlineCitation/Article/Journal/JournalIssue/PubDate')
+_ABSTRACT = _elements_path('MedlineCitation/Article/Abstract/AbstractText')
+_REVISED = _elements_path('MedlineCitation/DateRevised')
+
+
 class PubMedService:
     """Service for interacting with PubMed API via NCBI E-utilities"""
     
     BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
-    RATE_LIMIT_DELAY = 0.5  # Increased delay to be more conservative
+    RATE_LIMIT_DELAY = 1 / 3  # NCBI allows 3 requests/second per IP...
+    API_KEY_RATE_LIMIT_DELAY = 1 / 10  # ...and 10 with an API key
     MAX_RETRIES = 3
+    BATCH_SIZE = 100  # PMIDs per elink request
+    EFETCH_BATCH_SIZE = 200  # PMIDs per efetch request
+    CONNECTION_LIMIT = 10  # Pooled keep-alive connections to E-utilities
+    REFERENCES_LINKNAME = 'pubmed_pubmed_refs'
+    CITATIONS_LINKNAME = 'pubmed_pubmed_citedin'
     
-    def __init__(self):
-        self.last_request_time = 0
+    def __init__(self, cache: Optional[ResponseCache] = None, api_key: str = NCBI_API_KEY,
+                 tool: str = NCBI_TOOL, email: str = NCBI_EMAIL, http_client: str = PUBMED_HTTP_CLIENT,
+                 session: Optional[Union[httpx.AsyncClient, aiohttp.ClientSession]] = None):
+        # Parsed records by PMID, persisted across runs;
+        # None when PUBMED_CACHE_DISABLE is set, so every lookup goes to NCBI
+        if cache is None and not PUBMED_CACHE_DISABLE:
+            cache = ResponseCache(PUBMED_CACHE_DIR, PUBMED_CACHE_TTL)
+        self.cache: Optional[ResponseCache] = cache
         
-    async def _rate_limit(self):
-        """Ensure we don't exceed rate limits with jitter"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        # Parsed results by PMID, reused within this process
+        self._details_memo: Dict[int, Dict] = {}
+        self._links_memo: Dict[str, Dict[int, List[int]]] = {}
         
-        # Add some jitter to avoid thundering herd
-        jitter = random.uniform(0, 0.1)
-        required_delay = self.RATE_LIMIT_DELAY + jitter
+        # Fetches underway by (kind, PMID), so concurrent callers share one request
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
         
-        if time_since_last < required_delay:
-            await asyncio.sleep(required_delay - time_since_last)
+        # Identification NCBI asks every request to carry; not part of cache keys
+        identity = urlencode({key: value for key, value in (('api_key', api_key), ('tool', tool), ('email', email)) if value})
+        self._identity = f"&{identity}" if identity else ''
+        self.rate_limit_delay = self.API_KEY_RATE_LIMIT_DELAY if api_key else self.RATE_LIMIT_DELAY
         
-        self.last_request_time = time.time()
+        # Token bucket: one token per rate_limit_delay, holding at most one
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._rate_lock = asyncio.Lock()
+        
+        # 'httpx' multiplexes requests over HTTP/2; 'aiohttp' is the HTTP/1.1 fallback
+        if http_client not in ('httpx', 'aiohttp'):
+            raise ValueError(f"Unknown HTTP client {http_client!r}; expected 'httpx' or 'aiohttp'")
+        self.http_client = http_client
+        # A caller-supplied session is used as is and left for the caller to close
+        self._session: Optional[Union[httpx.AsyncClient, aiohttp.ClientSession]] = session
+        self._owns_session = False
+        self._session_users = 0
     
-    async def _make_request(self, session: aiohttp.ClientSession, url: str, retries: int = 0) -> Optional[Dict]:
-        """Make a rate-limited request to NCBI API with retry logic"""
+    async def __aenter__(self) -> 'PubMedService':
+        """
+        Open (or join) the shared HTTP session
+        
+        Nested and concurrent `async with` blocks share one session and its
+        connection pool; it is closed when the last of them exits, unless it
+        was passed in by the caller.
+        """
+        if self._session is None:
+            self._owns_session = True
+            # elink responses for highly cited articles compress well
+            headers = {'Accept-Encoding': 'gzip'}
+            if self.http_client == 'httpx':
+                # Over HTTP/2 concurrent requests share one connection instead of one each
+                self._session = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=self.CONNECTION_LIMIT, max_keepalive_connections=self.CONNECTION_LIMIT,
+                        keepalive_expiry=60
+                    ),
+                    timeout=30,
+                    headers=headers,
+                    verify=_ssl_context('httpx')
+                )
+            else:
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=self.CONNECTION_LIMIT, limit_per_host=self.CONNECTION_LIMIT, keepalive_timeout=60,
+                        ssl=_ssl_context('aiohttp')
+                    ),
+                    timeout=aiohttp.ClientTimeout(total=30),
+                    headers=headers
+                )
+        self._session_users += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._session_users -= 1
+        if self._session_users == 0 and self._owns_session:
+            session, self._session = self._session, None
+            self._owns_session = False
+            if isinstance(session, httpx.AsyncClient):
+                await session.aclose()
+            else:
+                await session.close()
+    
+    async def _send(self, url: str, data: Optional[str] = None) -> Tuple[int, bytes]:
+        """
+        Status and body of a request on the shared session, whichever client backs it
+        
+        Sends a GET, or a form-encoded POST of data if given.
+        """
+        method = 'GET' if data is None else 'POST'
+        headers = None if data is None else {'Content-Type': 'application/x-www-form-urlencoded'}
+        if isinstance(self._session, httpx.AsyncClient):
+            try:
+                response = await self._session.request(method, url, content=data, headers=headers)
+            except httpx.TimeoutException as exc:
+                raise asyncio.TimeoutError() from exc
+            return response.status_code, response.content
+        async with self._session.request(method, url, data=data, headers=headers) as response:
+            return response.status, await response.read()
+        
+    async def _rate_limit(self):
+        """
+        Ensure we don't exceed rate limits
+        
+        Takes a token from the bucket, waiting for one to refill if needed.
+        The lock queues concurrent callers, so each gets its own token rather
+        than all of them acting on the same last-request timestamp.
+        """
+        async with self._rate_lock:
+            now = time.monotonic()
+            self._tokens = min(1.0, self._tokens + (now - self._last_refill) / self.rate_limit_delay)
+            self._last_refill = now
+            if self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) * self.rate_limit_delay)
+                self._tokens = 1.0
+                self._last_refill = time.monotonic()
+            self._tokens -= 1.0
+    
+    async def _make_request(self, url: str, retries: int = 0, data: Optional[str] = None) -> Optional[bytes]:
+        """
+        Make a rate-limited request to NCBI API with retry logic, on the shared session
+        
+        Parameters in data are POSTed instead of going in the URL, for ID
+        lists too long for a GET. Responses are not cached here; callers
+        cache the records parsed from them per PMID. The API key, tool and
+        email are appended only when sending.
+        """
         await self._rate_limit()
         
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                if response.status == 200:
-                    return await response.text()
-                elif response.status == 429 and retries < self.MAX_RETRIES:
-                    # Rate limited - wait longer and retry
-                    wait_time = (2 ** retries) + random.uniform(0, 1)
-                    logger.warning(f"Rate limited, waiting {wait_time:.2f}s before retry {retries + 1}")
-                    await asyncio.sleep(wait_time)
-                    return await self._make_request(session, url, retries + 1)
-                else:
-                    logger.error(f"API request failed: {response.status}")
-                    return None
+            if data is None:
+                status, body = await self._send(url + self._identity)
+            else:
+                status, body = await self._send(url, data + self._identity)
+            if status == 200:
+                return body
+            elif status == 429 and retries < self.MAX_RETRIES:
+                # Rate limited - wait longer and retry
+                wait_time = (2 ** retries) + random.uniform(0, 1)
+                logger.warning(f"Rate limited, waiting {wait_time:.2f}s before retry {retries + 1}")
+                await asyncio.sleep(wait_time)
+                return await self._make_request(url, retries + 1, data)
+            else:
+                logger.error(f"API request failed: {status}")
+                return None
         except asyncio.TimeoutError:
             logger.error("Request timeout")
             return None
@@ -58,105 +234,277 @@ class PubMedService:
                 wait_time = (2 ** retries) + random.uniform(0, 1)
                 logger.warning(f"Retrying in {wait_time:.2f}s...")
                 await asyncio.sleep(wait_time)
-                return await self._make_request(session, url, retries + 1)
+                return await self._make_request(url, retries + 1, data)
             return None
     
-    async def get_article_details(self, pmid: str) -> Optional[Dict]:
+    def _claim(self, kind: str, pmids: Iterable[int]) -> Tuple[List[int], Dict[int, asyncio.Future]]:
+        """
+        Split PMIDs into those this caller must fetch and those already being fetched
+        
+        The returned PMIDs to fetch are registered as in flight and must be
+        passed to _settle once done; the rest come back as futures of the
+        fetches already underway.
+        """
+        loop = asyncio.get_running_loop()
+        to_fetch, pending = [], {}
+        for pmid in pmids:
+            future = self._inflight.get((kind, pmid))
+            if future is None:
+                self._inflight[(kind, pmid)] = loop.create_future()
+                to_fetch.append(pmid)
+            else:
+                pending[pmid] = future
+        return to_fetch, pending
+    
+    async def _recall(self, kind: str, pmids: Iterable[int], memo: Dict[int, Any]) -> None:
+        """Load records stored on disk by an earlier run into memo, for PMIDs it lacks"""
+        wanted = [pmid for pmid in pmids if pmid not in memo]
+        if self.cache is not None and wanted:
+            # SQLite blocks, so it runs off the event loop like GraphStore.save
+            memo.update(await asyncio.get_running_loop().run_in_executor(None, self.cache.get_records, kind, wanted))
+    
+    async def _store(self, kind: str, records: Dict[int, Any]) -> None:
+        """Persist freshly fetched records for later runs"""
+        if self.cache is not None and records:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.set_records, kind, records)
+    
+    def _settle(self, kind: str, pmids: List[int], results: Dict[int, Any]) -> None:
+        """Hand results (None where missing) to callers waiting on these PMIDs"""
+        for pmid in pmids:
+            future = self._inflight.pop((kind, pmid))
+            if not future.done():
+                future.set_result(results.get(pmid))
+    
+    async def get_article_details(self, pmid: int) -> Optional[Dict]:
         """Fetch article details by PMID"""
-        url = f"{self.BASE_URL}/esummary.fcgi?db=pubmed&id={pmid}&retmode=json"
+        pmid = int(pmid)
+        return (await self.get_article_details_batch([pmid])).get(pmid)
+    
+    async def get_article_details_batch(self, pmids: List[int]) -> Dict[int, Dict]:
+        """Fetch details for many PMIDs, one efetch request per EFETCH_BATCH_SIZE of them"""
+        await self._recall('details', pmids, self._details_memo)
+        articles = {pmid: self._details_memo[pmid] for pmid in pmids if pmid in self._details_memo}
+        missing, pending = self._claim('details', (pmid for pmid in dict.fromkeys(pmids) if pmid not in articles))
+        try:
+            await self._fetch_details(missing, articles)
+        finally:
+            self._settle('details', missing, articles)
         
-        async with aiohttp.ClientSession() as session:
-            response = await self._make_request(session, url)
-            if response:
+        for pmid, future in pending.items():
+            article = await asyncio.shield(future)
+            if article is not None:
+                articles[pmid] = article
+        return articles
+    
+    async def _fetch_details(self, missing: List[int], articles: Dict[int, Dict]) -> None:
+        """Fetch PubMed XML records for PMIDs into articles"""
+        if not missing:
+            # All served from memory or disk; no need for a session
+            return
+        async with self:
+            for start in range(0, len(missing), self.EFETCH_BATCH_SIZE):
+                batch = missing[start:start + self.EFETCH_BATCH_SIZE]
+                # POSTed, as a GET with hundreds of IDs can exceed URL length limits
+                data = f"db=pubmed&retmode=xml&id={','.join(map(str, batch))}"
+                response = await self._make_request(f"{self.BASE_URL}/efetch.fcgi", data=data)
+                if not response:
+                    continue
+                wanted = set(batch)
+                fetched = {}
                 try:
-                    import json
-                    data = json.loads(response)
-                    if 'result' in data and pmid in data['result']:
-                        article = data['result'][pmid]
-                        article_data = {
-                            'pmid': pmid,
-                            'title': article.get('title', ''),
-                            'authors': article.get('authors', []),
-                            'journal': article.get('fulljournalname', ''),
-                            'pubdate': article.get('pubdate', ''),
-                            'abstract': article.get('abstract', ''),
-                            'doi': article.get('elocationid', ''),
-                            'last_updated': article.get('lastauthor', '')
-                        }
-                        
-                        # Print CLI data snippet
-                        print(f"📄 PMID {pmid}: {article_data['title'][:60]}...")
-                        if article_data['authors']:
-                            if isinstance(article_data['authors'][0], dict):
-                                author_names = [author.get('name', 'Unknown') for author in article_data['authors'][:2]]
-                            else:
-                                author_names = article_data['authors'][:2]
-                            print(f"   👥 Authors: {', '.join(author_names)}{'...' if len(article_data['authors']) > 2 else ''}")
-                        print(f"   📚 Journal: {article_data['journal']}")
-                        print(f"   📅 Published: {article_data['pubdate']}")
-                        
-                        return article_data
-                except Exception as e:
+                    for article in self._iter_articles(response):
+                        if article['pmid'] in wanted:
+                            fetched[article['pmid']] = article
+                except (ET.ParseError, ValueError) as e:
                     logger.error(f"Error parsing article details: {e}")
-            return None
+                articles.update(fetched)
+                self._details_memo.update(fetched)
+                await self._store('details', fetched)
     
-    async def get_references(self, pmid: str) -> List[str]:
-        """Get PMIDs of articles that this article references"""
-        url = f"{self.BASE_URL}/elink.fcgi?dbfrom=pubmed&db=pubmed&id={pmid}&linkname=pubmed_pubmed_refs&retmode=json"
+    def _iter_articles(self, body: bytes) -> Iterator[Dict]:
+        """
+        Article data for each record of an efetch PubmedArticleSet
         
-        async with aiohttp.ClientSession() as session:
-            response = await self._make_request(session, url)
-            if response:
-                try:
-                    import json
-                    data = json.loads(response)
-                    if 'linksets' in data and len(data['linksets']) > 0:
-                        linkset = data['linksets'][0]
-                        if 'linksetdbs' in linkset and len(linkset['linksetdbs']) > 0:
-                            references = [str(ref) for ref in linkset['linksetdbs'][0].get('links', [])]
-                            print(f"   📖 References: {len(references)} articles")
-                            if references:
-                                print(f"      Sample: {', '.join(references[:3])}{'...' if len(references) > 3 else ''}")
-                            return references
-                except Exception as e:
-                    logger.error(f"Error parsing references: {e}")
-            return []
+        Records are parsed as the stream reaches their end tag and cleared
+        straight after, so only one is held as a tree at a time. With lxml,
+        libxml2 does the tag filtering and cleared records are also detached
+        from the root.
+        """
+        if _LXML:
+            for _, elem in ET.iterparse(io.BytesIO(body), events=('end',), tag='PubmedArticle'):
+                yield self._parse_article(elem)
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            return
+        for _, elem in ET.iterparse(io.BytesIO(body), events=('end',)):
+            if elem.tag == 'PubmedArticle':
+                yield self._parse_article(elem)
+                elem.clear()
     
-    async def get_citations(self, pmid: str) -> List[str]:
-        """Get PMIDs of articles that cite this article"""
-        url = f"{self.BASE_URL}/elink.fcgi?dbfrom=pubmed&db=pubmed&id={pmid}&linkname=pubmed_pubmed_citedin&retmode=json"
+    def _parse_article(self, elem: ET.Element) -> Dict:
+        """Convert one PubmedArticle element into article data"""
+        pmid = int(_PMID(elem))
+        
+        authors = []
+        # One pass over each author's children; a findtext per name part costs
+        # more than the parse itself under lxml
+        for author in _AUTHORS(elem):
+            parts = {child.tag: child.text for child in author}
+            name = parts.get('CollectiveName') or ' '.join(
+                part for part in (parts.get('LastName'), parts.get('Initials')) if part
+            )
+            if name:
+                authors.append(name)
+        
+        pubdate = ''
+        for date in _PUBDATE(elem)[:1]:
+            parts = {child.tag: child.text for child in date}
+            pubdate = parts.get('MedlineDate') or ' '.join(
+                part for part in (parts.get('Year'), parts.get('Month'), parts.get('Day')) if part
+            )
+        
+        last_updated = ''
+        for date in _REVISED(elem)[:1]:
+            parts = {child.tag: child.text for child in date}
+            last_updated = '-'.join(parts.get(part) or '' for part in ('Year', 'Month', 'Day'))
         
-        async with aiohttp.ClientSession() as session:
-            response = await self._make_request(session, url)
-            if response:
+        article_data = {
+            'pmid': pmid,
+            'title': _TITLE(elem),
+            'authors': authors,
+            'journal': _JOURNAL(elem),
+            'pubdate': pubdate,
+            'abstract': '\n'.join(
+                (f"{text.get('Label')}: " if text.get('Label') else '') + ''.join(text.itertext())
+                for text in _ABSTRACT(elem)
+            ),
+            'doi': _DOI(elem),
+            'last_updated': last_updated
+        }
+        
+        # Article snippet; the formatting is skipped unless debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"PMID {pmid}: {article_data['title'][:60]}...")
+            if authors:
+                logger.debug(f"  Authors: {', '.join(authors[:2])}{'...' if len(authors) > 2 else ''}")
+            logger.debug(f"  Journal: {article_data['journal']}")
+            logger.debug(f"  Published: {article_data['pubdate']}")
+        
+        return article_data
+    
+    async def _get_links_batch(self, pmids: List[int], linknames: Tuple[str, ...]) -> Dict[str, Dict[int, List[int]]]:
+        """
+        Linked PMIDs for many source PMIDs, keyed by linkname then PMID
+        
+        Every linkname is requested in the same elink call, one call per
+        BATCH_SIZE PMIDs. Each PMID is sent as its own id= parameter, which
+        makes elink return one linkset per source PMID instead of merging
+        their links.
+        """
+        unique = list(dict.fromkeys(pmids))
+        for linkname in linknames:
+            await self._recall(linkname, unique, self._links_memo.setdefault(linkname, {}))
+        claims = {
+            linkname: self._claim(linkname, (pmid for pmid in unique if pmid not in self._links_memo[linkname]))
+            for linkname in linknames
+        }
+        links = {linkname: {pmid: [] for pmid in missing} for linkname, (missing, _) in claims.items()}
+        try:
+            await self._fetch_links(
+                list(dict.fromkeys(pmid for missing, _ in claims.values() for pmid in missing)), linknames, links
+            )
+        finally:
+            for linkname, (missing, _) in claims.items():
+                self._settle(linkname, missing, links[linkname])
+        
+        results = {}
+        for linkname, (_, pending) in claims.items():
+            for pmid, future in pending.items():
+                links[linkname][pmid] = await asyncio.shield(future) or []
+            memo = self._links_memo[linkname]
+            results[linkname] = {pmid: memo.get(pmid, links[linkname].get(pmid, [])) for pmid in pmids}
+        return results
+    
+    async def _fetch_links(self, missing: List[int], linknames: Tuple[str, ...],
+                           links: Dict[str, Dict[int, List[int]]]) -> None:
+        """Fetch elink results for PMIDs into links, memoizing each batch that parses"""
+        if not missing:
+            return
+        names = '&'.join(f"linkname={linkname}" for linkname in linknames)
+        async with self:
+            for start in range(0, len(missing), self.BATCH_SIZE):
+                batch = missing[start:start + self.BATCH_SIZE]
+                ids = '&'.join(f"id={pmid}" for pmid in batch)
+                url = f"{self.BASE_URL}/elink.fcgi?dbfrom=pubmed&db=pubmed&{ids}&{names}&retmode=json"
+                response = await self._make_request(url)
+                if not response:
+                    continue
                 try:
-                    import json
-                    data = json.loads(response)
-                    if 'linksets' in data and len(data['linksets']) > 0:
-                        linkset = data['linksets'][0]
-                        if 'linksetdbs' in linkset and len(linkset['linksetdbs']) > 0:
-                            citations = [str(citation) for citation in linkset['linksetdbs'][0].get('links', [])]
-                            print(f"   📚 Citations: {len(citations)} articles")
-                            if citations:
-                                print(f"      Sample: {', '.join(citations[:3])}{'...' if len(citations) > 3 else ''}")
-                            return citations
+                    data = orjson.loads(response)
+                    for linkset in data.get('linksets', []):
+                        source_ids = [int(source) for source in linkset.get('ids', [])]
+                        if len(source_ids) != 1:
+                            continue
+                        for linksetdb in linkset.get('linksetdbs', []):
+                            # Linksets are partitioned by linkname; a lone linkname may be implied
+                            linkname = linksetdb.get('linkname', linknames[0] if len(linknames) == 1 else None)
+                            if source_ids[0] in links.get(linkname, ()):
+                                links[linkname][source_ids[0]] = [int(link) for link in linksetdb.get('links', [])]
+                    for linkname, found in links.items():
+                        fetched = {pmid: found[pmid] for pmid in batch if pmid in found}
+                        self._links_memo[linkname].update(fetched)
+                        await self._store(linkname, fetched)
                 except Exception as e:
-                    logger.error(f"Error parsing citations: {e}")
-            return []
+                    logger.error(f"Error parsing {', '.join(linknames)} links: {e}")
+    
+    def _log_links(self, pmid: int, kind: str, linked: List[int]) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"PMID {pmid} {kind}: {len(linked)} articles")
+            if linked:
+                logger.debug(f"  Sample: {', '.join(map(str, linked[:3]))}{'...' if len(linked) > 3 else ''}")
+    
+    async def get_references(self, pmid: int) -> List[int]:
+        """Get PMIDs of articles that this article references"""
+        pmid = int(pmid)
+        references = (await self.get_references_batch([pmid]))[pmid]
+        self._log_links(pmid, 'references', references)
+        return references
+    
+    async def get_references_batch(self, pmids: List[int]) -> Dict[int, List[int]]:
+        """Get the referenced PMIDs of many articles, keyed by PMID"""
+        return (await self._get_links_batch(pmids, (self.REFERENCES_LINKNAME,)))[self.REFERENCES_LINKNAME]
     
-    async def get_article_relationships(self, pmid: str) -> Dict:
+    async def get_citations(self, pmid: int) -> List[int]:
+        """Get PMIDs of articles that cite this article"""
+        pmid = int(pmid)
+        citations = (await self.get_citations_batch([pmid]))[pmid]
+        self._log_links(pmid, 'citations', citations)
+        return citations
+    
+    async def get_citations_batch(self, pmids: List[int]) -> Dict[int, List[int]]:
+        """Get the citing PMIDs of many articles, keyed by PMID"""
+        return (await self._get_links_batch(pmids, (self.CITATIONS_LINKNAME,)))[self.CITATIONS_LINKNAME]
+    
+    async def get_article_relationships(self, pmid: int) -> Dict:
         """Get both references and citations for an article"""
-        print(f"\n🔍 Fetching relationships for PMID {pmid}...")
-        references, citations = await asyncio.gather(
-            self.get_references(pmid),
-            self.get_citations(pmid)
-        )
-        
-        print(f"   ✅ Total connections: {len(references) + len(citations)}")
-        print()
-        
+        pmid = int(pmid)
+        logger.debug("Fetching relationships for PMID %s", pmid)
+        relationships = (await self.get_article_relationships_batch([pmid]))[pmid]
+        self._log_links(pmid, 'references', relationships['references'])
+        self._log_links(pmid, 'citations', relationships['citations'])
+        logger.debug("PMID %s total connections: %d", pmid, len(relationships['references']) + len(relationships['citations']))
+        return relationships
+    
+    async def get_article_relationships_batch(self, pmids: List[int]) -> Dict[int, Dict]:
+        """Get references and citations for many articles, keyed by PMID, from one elink call per batch"""
+        links = await self._get_links_batch(pmids, (self.REFERENCES_LINKNAME, self.CITATIONS_LINKNAME))
+        references, citations = links[self.REFERENCES_LINKNAME], links[self.CITATIONS_LINKNAME]
         return {
-            'pmid': pmid,
-            'references': references,
-            'citations': citations
-        } 
\ No newline at end of file
+            pmid: {
+                'pmid': pmid,
+                'references': references[pmid],
+                'citations': citations[pmid]
+            }
+            for pmid in pmids
+        }
@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    On-disk cache backed by SQLite
+
+    Holds parsed E-utilities records keyed by (kind, PMID), so an article is
+    reused whichever batch it was fetched in. Raw response bodies are not
+    kept: batched request keys almost never repeat. Safe to use from several
+    threads, so callers on an event loop can run it in an executor.
+    """
+
+    LOOKUP_CHUNK = 500  # PMIDs per IN (...) query, below SQLite's variable limit
+
+    def __init__(self, directory: Path, ttl: float):
+        self.path = Path(directory) / "responses.sqlite3"
+        self.ttl = ttl  # Seconds an entry stays valid
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()  # One connection, so one statement at a time
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use, purging expired entries"""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS records "
+                "(kind TEXT NOT NULL, pmid INTEGER NOT NULL, json BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (kind, pmid))"
+            )
+            self.expire()
+        return self._db
+
+    def get_records(self, kind: str, pmids: Iterable[int]) -> Dict[int, Any]:
+        """Unexpired records of a kind for the given PMIDs, keyed by PMID; missing ones are left out"""
+        pmids = list(pmids)
+        now = time.time()
+        records = {}
+        with self._lock:
+            db = self._connect()
+            for start in range(0, len(pmids), self.LOOKUP_CHUNK):
+                chunk = pmids[start:start + self.LOOKUP_CHUNK]
+                rows = db.execute(
+                    f"SELECT pmid, json FROM records WHERE kind = ? AND expires_at > ? "
+                    f"AND pmid IN ({','.join('?' * len(chunk))})",
+                    (kind, now, *chunk)
+                )
+                records.update((pmid, orjson.loads(body)) for pmid, body in rows)
+        return records
+
+    def set_records(self, kind: str, records: Dict[int, Any]) -> None:
+        """Store records of a kind, keyed by PMID, for ttl seconds"""
+        if not records:
+            return
+        expires_at = time.time() + self.ttl
+        rows = [(kind, pmid, orjson.dumps(record), expires_at) for pmid, record in records.items()]
+        with self._lock:
+            db = self._connect()
+            db.executemany("INSERT OR REPLACE INTO records (kind, pmid, json, expires_at) VALUES (?, ?, ?, ?)", rows)
+            db.commit()
+
+    def expire(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        with self._lock:
+            db = self._connect()
+            removed = db.execute("DELETE FROM records WHERE expires_at <= ?", (time.time(),)).rowcount
+            db.commit()
+        if removed:
+            logger.info(f"Expired {removed} cached entries")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
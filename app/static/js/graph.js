@@ -1,6 +1,6 @@
 // Global variables
 let currentGraphId = null;
-let statusPollingInterval = null;
+let statusEvents = null;
 let graphData = null;
 let simulation = null;
 
@@ -68,8 +68,8 @@ async function handleFormSubmit(event) {
     const result = await response.json();
     currentGraphId = result.graph_id;
     
-    // Start polling for status
-    startStatusPolling();
+    // Follow build progress
+    startStatusEvents();
     
   } catch (error) {
     console.error('Error creating graph:', error);
@@ -78,38 +78,38 @@ async function handleFormSubmit(event) {
   }
 }
 
-// Status polling
-function startStatusPolling() {
-  if (statusPollingInterval) {
-    clearInterval(statusPollingInterval);
+// Status updates, pushed by the server as Server-Sent Events
+function startStatusEvents() {
+  if (statusEvents) {
+    statusEvents.close();
   }
   
-  statusPollingInterval = setInterval(async () => {
-    try {
-      const response = await fetch(`/api/graph/${currentGraphId}/status`);
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      
-      const status = await response.json();
-      updateLoadingStatus(status);
-      
-      if (status.status === 'completed' || status.status === 'completed_with_limit') {
-        clearInterval(statusPollingInterval);
-        await loadGraphData();
-      } else if (status.status === 'error') {
-        clearInterval(statusPollingInterval);
-        showError('Graph generation failed. Please try again.');
-        hideLoading();
-      }
-      
-    } catch (error) {
-      console.error('Error polling status:', error);
-      clearInterval(statusPollingInterval);
-      showError('Failed to check graph status. Please try again.');
+  statusEvents = new EventSource(`/api/graph/${currentGraphId}/events`);
+  
+  statusEvents.onmessage = async (event) => {
+    const status = JSON.parse(event.data);
+    updateLoadingStatus(status);
+    
+    if (status.status === 'completed' || status.status === 'completed_with_limit') {
+      statusEvents.close();
+      await loadGraphData();
+    } else if (status.status === 'error') {
+      statusEvents.close();
+      showError('Graph generation failed. Please try again.');
+      hideLoading();
+    } else if (status.status === 'deleted') {
+      statusEvents.close();
+      showError('The graph was deleted while it was being built.');
       hideLoading();
     }
-  }, 2000); // Poll every 2 seconds
+  };
+  
+  statusEvents.onerror = (error) => {
+    console.error('Error receiving status updates:', error);
+    statusEvents.close();
+    showError('Failed to check graph status. Please try again.');
+    hideLoading();
+  };
 }
 
 // Update loading status
@@ -136,7 +136,7 @@ async function loadGraphData() {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
     
-    graphData = await response.json();
+    graphData = unpackGraphData(await response.json());
     hideLoading();
     showGraph();
     renderGraph();
@@ -153,6 +153,32 @@ async function loadGraphData() {
   }
 }
 
+// Turn columnar {field: [values]} data into an array of records
+function columnsToRecords(columns) {
+  const fields = Object.keys(columns);
+  const length = fields.length ? columns[fields[0]].length : 0;
+  return Array.from({ length }, (_, i) => {
+    const record = {};
+    for (const field of fields) {
+      record[field] = columns[field][i];
+    }
+    return record;
+  });
+}
+
+// Unpack the columnar graph payload into the node/edge records D3 expects
+function unpackGraphData(payload) {
+  const nodes = columnsToRecords(payload.nodes);
+  for (const node of nodes) {
+    node.is_seed = node.id === payload.metadata.seed_pmid;
+  }
+  return {
+    nodes,
+    edges: columnsToRecords(payload.edges),
+    metadata: payload.metadata
+  };
+}
+
 // Show limit warning
 function showLimitWarning() {
   const warningDiv = document.createElement('div');
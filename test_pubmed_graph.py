@@ -1,119 +1,167 @@
 #!/usr/bin/env python3
 """
 Test script for PubMed Knowledge Graph functionality
+
+Run directly, or under pytest (`pytest test_pubmed_graph.py`), where both
+tests share one session-scoped HTTP session and event loop. Graphs and
+cached responses go to a temporary directory, never the configured ones.
 """
 
 import asyncio
 import aiohttp
-import json
-from app.services.pubmed_service import PubMedService
+import os
+import sys
+import tempfile
+import traceback
+from pathlib import Path
+import pytest
+import pytest_asyncio
+from app.core.config import PUBMED_CACHE_TTL
+from app.services.pubmed_service import PubMedService, _ssl_context
 from app.services.graph_service import GraphService
+from app.services.graph_store import GraphStore
+from app.services.response_cache import ResponseCache
+
+def write_lines(lines):
+    """Write a section's lines to stdout in one call"""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def client_session():
+    """One pooled keep-alive session, shared by both tests"""
+    connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60, ssl=_ssl_context('aiohttp'))
+    return aiohttp.ClientSession(connector=connector)
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def session():
+    async with client_session() as session:
+        yield session
 
-async def test_pubmed_service():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_pubmed_service(session, tmp_path):
     """Test the PubMed service with a sample PMID"""
-    print("Testing PubMed Service...")
-    
     # Use a well-known PMID for testing (COVID-19 related paper)
     test_pmid = "32284615"  # "Clinical Characteristics of Coronavirus Disease 2019 in China"
     
-    pubmed_service = PubMedService()
+    pubmed_service = PubMedService(cache=ResponseCache(tmp_path / "cache", PUBMED_CACHE_TTL), session=session)
     
-    print(f"Fetching details for PMID: {test_pmid}")
+    write_lines(["Testing PubMed Service...", f"Fetching details and relationships for PMID: {test_pmid}"])
     
-    # Get article details
-    article_details = await pubmed_service.get_article_details(test_pmid)
+    # efetch and elink are independent, so overlap their round trips;
+    # the service's rate limiter still spaces the requests
+    async with pubmed_service:
+        details_batch, relationships = await asyncio.gather(
+            pubmed_service.get_article_details_batch([int(test_pmid)]),
+            pubmed_service.get_article_relationships(test_pmid)
+        )
+    article_details = details_batch.get(int(test_pmid))
+    out = []
     if article_details:
-        print(f"✓ Article found: {article_details['title']}")
+        out.append(f"✓ Article found: {article_details['title']}")
         
-        # Handle authors properly
+        # Authors are plain name strings
         if article_details['authors']:
-            if isinstance(article_details['authors'][0], dict):
-                # Authors are dictionaries with 'name' field
-                author_names = [author.get('name', 'Unknown') for author in article_details['authors'][:3]]
-            else:
-                # Authors are strings
-                author_names = article_details['authors'][:3]
-            print(f"  Authors: {', '.join(author_names)}...")
+            out.append(f"  Authors: {', '.join(article_details['authors'][:3])}...")
         else:
-            print("  Authors: Not available")
+            out.append("  Authors: Not available")
             
-        print(f"  Journal: {article_details['journal']}")
-        print(f"  Published: {article_details['pubdate']}")
+        out.append(f"  Journal: {article_details['journal']}")
+        out.append(f"  Published: {article_details['pubdate']}")
     else:
-        print("✗ Failed to fetch article details")
-        return
-    
-    # Get relationships
-    print("\nFetching article relationships...")
-    relationships = await pubmed_service.get_article_relationships(test_pmid)
+        raise AssertionError("Failed to fetch article details")
     
-    print(f"✓ References (cites): {len(relationships['references'])} articles")
-    print(f"✓ Citations (cited by): {len(relationships['citations'])} articles")
+    out.append("\nArticle relationships:")
+    out.append(f"✓ References (cites): {len(relationships['references'])} articles")
+    out.append(f"✓ Citations (cited by): {len(relationships['citations'])} articles")
     
     if relationships['references']:
-        print(f"  Sample references: {relationships['references'][:5]}")
+        out.append(f"  Sample references: {relationships['references'][:5]}")
     if relationships['citations']:
-        print(f"  Sample citations: {relationships['citations'][:5]}")
-    
-    return test_pmid, article_details, relationships
+        out.append(f"  Sample citations: {relationships['citations'][:5]}")
+    write_lines(out)
 
-async def test_graph_service():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_graph_service(session, tmp_path):
     """Test the graph service"""
-    print("\n" + "="*50)
-    print("Testing Graph Service...")
-    
     test_pmid = "32284615"
-    graph_service = GraphService()
+    graph_service = GraphService(
+        store=GraphStore(tmp_path / "graphs"),
+        session=session,
+        cache=ResponseCache(tmp_path / "cache", PUBMED_CACHE_TTL)
+    )
     
     # Create a test graph
     graph_id = "test-graph-001"
     graph_info = graph_service.create_graph(graph_id, test_pmid)
-    print(f"✓ Created graph: {graph_info}")
     
     # Build the graph (limited depth for testing)
-    print("Building graph (depth 1)...")
+    write_lines([
+        "\n" + "="*50,
+        "Testing Graph Service...",
+        f"✓ Created graph: {graph_info}",
+        "Building graph (depth 1)..."
+    ])
     result = await graph_service.build_graph(graph_id, max_depth=1)
-    print(f"✓ Graph built: {result}")
+    assert result['status'] in GraphService.TERMINAL_STATUSES, result
+    out = [f"✓ Graph built: {result}"]
     
     # Get graph data
     graph_data = graph_service.get_graph_data(graph_id)
-    if graph_data:
-        print(f"✓ Graph data retrieved:")
-        print(f"  Nodes: {len(graph_data['nodes'])}")
-        print(f"  Edges: {len(graph_data['edges'])}")
-        print(f"  Seed PMID: {graph_data['metadata']['seed_pmid']}")
-        
-        # Show some sample nodes
-        print("\nSample nodes:")
-        for i, node in enumerate(graph_data['nodes'][:3]):
-            print(f"  {i+1}. PMID {node['id']}: {node['title'][:50]}...")
+    assert graph_data is not None, "Failed to retrieve graph data"
+    node_count = len(graph_data['nodes']['id'])
+    edge_count = len(graph_data['edges']['source'])
+    out.append(f"✓ Graph data retrieved:")
+    out.append(f"  Nodes: {node_count}")
+    out.append(f"  Edges: {edge_count}")
+    out.append(f"  Seed PMID: {graph_data['metadata']['seed_pmid']}")
+    
+    # A build that reached nothing still completes, with a placeholder seed title
+    titles = dict(zip(graph_data['nodes']['id'], graph_data['nodes']['title']))
+    assert titles.get(test_pmid, f"PMID: {test_pmid}") != f"PMID: {test_pmid}", "Seed article details were not fetched"
+    assert node_count > 1, "No related articles were added"
+    assert edge_count > 1, "No relationships were added"
     
-    return graph_data
+    # Show some sample nodes, with their titles truncated
+    out.append("\nSample nodes:")
+    out.extend(
+        f"  {i+1}. PMID {pmid}: {titles[pmid][:graph_service.TITLE_SHORT_LENGTH]}..."
+        for i, pmid in enumerate(graph_data['nodes']['id'][:3])
+    )
+    write_lines(out)
 
 async def main():
     """Main test function"""
-    print("PubMed Knowledge Graph Test")
-    print("="*50)
+    write_lines(["PubMed Knowledge Graph Test", "="*50])
     
     try:
-        # Test PubMed service
-        await test_pubmed_service()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            async with client_session() as session:
+                # Test PubMed service
+                await test_pubmed_service(session, Path(tmp_dir) / "pubmed")
+                
+                # Test graph service
+                await test_graph_service(session, Path(tmp_dir) / "graph")
         
-        # Test graph service
-        graph_data = await test_graph_service()
-        
-        print("\n" + "="*50)
-        print("✓ All tests completed successfully!")
-        print("\nTo use the web interface:")
-        print("1. Open http://localhost:8000 in your browser")
-        print("2. Enter a PMID (e.g., 32284615)")
-        print("3. Select depth and click 'Generate Graph'")
-        print("4. Wait for the graph to build and explore!")
+        write_lines([
+            "\n" + "="*50,
+            "✓ All tests completed successfully!",
+            "\nTo use the web interface:",
+            "1. Open http://localhost:8000 in your browser",
+            "2. Enter a PMID (e.g., 32284615)",
+            "3. Select depth and click 'Generate Graph'",
+            "4. Wait for the graph to build and explore!"
+        ])
         
     except Exception as e:
         print(f"✗ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        # Set PUBMEDX_DEBUG=1 for the full traceback
+        if os.environ.get('PUBMEDX_DEBUG'):
+            traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    # libuv-based event loop where available, as uvicorn[standard] uses for the app
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main()) 
\ No newline at end of file